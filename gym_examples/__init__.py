@@ -4,3 +4,10 @@ register(
     id="gym_examples/GridWorld-v0",
     entry_point="gym_examples.envs:GridWorldEnv",
 )
+
+register(
+    id="gym_examples/Tetris-v0",
+    entry_point="gym_examples.envs.TetrisEnv:TetrisEnv",
+    # TetrisEnv使用gymnasium的空间，gym的环境检查器不接受
+    disable_env_checker=True,
+)
@@ -0,0 +1,298 @@
+"""Benchmarks for the environments, wrappers and renderers in gym_examples.
+
+Run ``python -m gym_examples.benchmarks --output results.json`` to print a
+report and save machine-readable results that can be compared across runs.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import gym
+import numpy as np
+
+from gym_examples.envs import GridWorldEnv, GridWorldModel, VectorGridWorldEnv
+from gym_examples.wrappers import (
+    ClipReward,
+    DiscreteActions,
+    FusedWrapper,
+    ReacherRewardWrapper,
+    RelativePosition,
+)
+
+
+# 返回多次测量中最快的一次（秒）
+def _best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# 单个环境的step吞吐量（steps/s），结束时自动reset
+def bench_step(env, n_steps, repeats=3, seed=0):
+    env.reset(seed=seed)
+    actions = [env.action_space.sample() for _ in range(n_steps)]
+
+    def run():
+        for action in actions:
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+
+    return n_steps / _best_of(run, repeats)
+
+
+# reset的平均耗时（秒）
+def bench_reset(env, n_resets, repeats=3, seed=0):
+    env.reset(seed=seed)
+
+    def run():
+        for _ in range(n_resets):
+            env.reset()
+
+    return _best_of(run, repeats) / n_resets
+
+
+# rgb_array渲染的平均耗时（秒），每帧之间走一步，让画面发生变化
+def bench_render(env, n_frames, repeats=3, seed=0):
+    env.reset(seed=seed)
+
+    def run():
+        for _ in range(n_frames):
+            _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+            if terminated or truncated:
+                env.reset()
+            env.render()
+
+    return _best_of(run, repeats) / n_frames
+
+
+# 批量环境的吞吐量（每秒的环境步数）
+def bench_vector_step(env, n_steps, repeats=3, seed=0):
+    env.reset(seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, env.single_action_space.n, size=(n_steps, env.num_envs))
+
+    def run():
+        for action in actions:
+            env.step(action)
+
+    return n_steps * env.num_envs / _best_of(run, repeats)
+
+
+# 为ReacherRewardWrapper提供reward_dist和reward_ctrl两个info项
+class _ReacherInfo(gym.Wrapper):
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        info["reward_dist"] = -info["distance"]
+        info["reward_ctrl"] = 0.0
+        return obs, reward, terminated, truncated, info
+
+
+def run_grid_world(results, n_steps, repeats):
+    sizes = [5, 10, 50, 100, 500]
+    results["grid_world"] = {}
+    for size in sizes:
+        env = GridWorldEnv(size=size)
+        results["grid_world"][f"size_{size}"] = {
+            "step_per_sec": bench_step(env, n_steps, repeats),
+            "reset_sec": bench_reset(env, n_steps // 10, repeats),
+        }
+        env.close()
+
+    for obs_mode in GridWorldEnv.metadata["obs_modes"]:
+        for with_info in (True, False):
+            env = GridWorldEnv(obs_mode=obs_mode, with_info=with_info)
+            key = f"obs_{obs_mode}" + ("" if with_info else "_no_info")
+            results["grid_world"][key] = bench_step(env, n_steps, repeats)
+            env.close()
+
+    env = GridWorldEnv(obs_mode="state_id", dynamics="table")
+    results["grid_world"]["dynamics_table"] = bench_step(env, n_steps, repeats)
+    env.close()
+
+    # 在size=200的表格模型上为一批目标求最优价值
+    model = GridWorldModel(200, GridWorldEnv()._action_to_direction)
+    targets = np.random.default_rng(0).integers(0, model.n_cells, size=8)
+    results["grid_world"]["value_iteration_size_200_8_targets_sec"] = _best_of(
+        lambda: model.value_iteration(targets), 1
+    )
+
+    for backend in GridWorldEnv.metadata["render_backends"]:
+        env = GridWorldEnv(render_mode="rgb_array", render_backend=backend)
+        results["grid_world"][f"render_{backend}_sec"] = bench_render(
+            env, max(n_steps // 100, 10), repeats
+        )
+        env.close()
+
+
+def run_wrappers(results, n_steps, repeats):
+    base = bench_step(GridWorldEnv(), n_steps, repeats)
+    stacks = {
+        "ClipReward": lambda env: ClipReward(env, 0, 0.5),
+        "DiscreteActions": lambda env: DiscreteActions(env, [0, 1, 2, 3]),
+        "RelativePosition": lambda env: RelativePosition(env),
+        "ReacherRewardWrapper": lambda env: ReacherRewardWrapper(
+            _ReacherInfo(env), 1.0, 0.1
+        ),
+        # 三层嵌套的包装器与融合后的单层包装器
+        "nested_stack": lambda env: RelativePosition(
+            ClipReward(DiscreteActions(env, [0, 1, 2, 3]), 0, 0.5)
+        ),
+        "fused_stack": lambda env: FusedWrapper(
+            RelativePosition(ClipReward(DiscreteActions(env, [0, 1, 2, 3]), 0, 0.5))
+        ),
+    }
+    results["wrappers"] = {"base_step_per_sec": base}
+    for name, make in stacks.items():
+        rate = bench_step(make(GridWorldEnv()), n_steps, repeats)
+        results["wrappers"][name] = {
+            "step_per_sec": rate,
+            "overhead_us": (1 / rate - 1 / base) * 1e6,
+        }
+
+
+def run_tetris(results, n_steps, repeats):
+    from gym_examples.envs.TetrisEnv import TetrisEnv
+    from gym_examples.envs.vector_tetris import VectorTetrisEnv
+
+    results["tetris"] = {}
+    for obs_mode in TetrisEnv.metadata["obs_modes"]:
+        env = TetrisEnv(gravity="ticks", obs_mode=obs_mode)
+        results["tetris"][obs_mode] = {
+            "step_per_sec": bench_step(env, n_steps, repeats),
+            "reset_sec": bench_reset(env, n_steps // 10, repeats),
+        }
+        env.close()
+
+    # 渲染需要pygame，只在安装了它的时候测试
+    try:
+        import pygame  # noqa: F401
+    except ImportError as e:
+        results["tetris"]["render_sec"] = f"skipped: {e}"
+    else:
+        env = TetrisEnv(render_mode="rgb_array", gravity="ticks", obs_mode="occupancy")
+        results["tetris"]["render_sec"] = bench_render(
+            env, max(n_steps // 100, 10), repeats
+        )
+        env.close()
+
+    results["vector_tetris"] = {}
+    for num_envs in [1, 64, 1024]:
+        env = VectorTetrisEnv(num_envs, copy=False)
+        results["vector_tetris"][f"batch_{num_envs}"] = bench_vector_step(
+            env, max(n_steps // num_envs, 20), repeats
+        )
+    env = VectorTetrisEnv(1024, copy=False, obs_mode="pixels", grayscale=True)
+    results["vector_tetris"]["pixels_gray_batch_1024"] = bench_vector_step(
+        env, max(n_steps // 1024, 20), repeats
+    )
+
+
+def run_vector_grid_world(results, n_steps, repeats):
+    results["vector_grid_world"] = {}
+    for num_envs in [1, 64, 1024, 16384]:
+        env = VectorGridWorldEnv(num_envs, copy=False)
+        results["vector_grid_world"][f"batch_{num_envs}"] = bench_vector_step(
+            env, max(n_steps // num_envs, 20), repeats
+        )
+
+
+# 在新的解释器中测量导入环境、构造并第一次reset的耗时，以及是否导入了pygame
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from {module} import {cls}
+imported = time.perf_counter()
+env = {cls}({kwargs})
+env.reset(seed=0)
+done = time.perf_counter()
+print(imported - start, done - imported, "pygame" in sys.modules)
+"""
+
+
+def run_startup(results, n_steps, repeats):
+    cases = {
+        "grid_world": ("gym_examples.envs.grid_world", "GridWorldEnv", ""),
+        "tetris": ("gym_examples.envs.TetrisEnv", "TetrisEnv", "gravity='ticks'"),
+    }
+    results["startup"] = {}
+    for name, (module, cls, kwargs) in cases.items():
+        script = _STARTUP_SCRIPT.format(module=module, cls=cls, kwargs=kwargs)
+        best = None
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, "-c", script],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            import_sec, reset_sec = float(output[0]), float(output[1])
+            if best is None or import_sec + reset_sec < sum(best[:2]):
+                best = (import_sec, reset_sec, output[2] == "True")
+        results["startup"][name] = {
+            "import_sec": best[0],
+            "first_reset_sec": best[1],
+            "pygame_imported": best[2],
+        }
+
+
+BENCHMARKS = {
+    "startup": run_startup,
+    "grid_world": run_grid_world,
+    "wrappers": run_wrappers,
+    "tetris": run_tetris,
+    "vector_grid_world": run_vector_grid_world,
+}
+
+
+def _machine_info():
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "gym": gym.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _print_results(results, indent=0):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            print(" " * indent + f"{key}:")
+            _print_results(value, indent + 2)
+        elif isinstance(value, float):
+            print(" " * indent + f"{key}: {value:.6g}")
+        else:
+            print(" " * indent + f"{key}: {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument("--steps", type=int, default=10000, help="steps per run")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per measurement")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {"machine": _machine_info()}
+    for name in args.only or BENCHMARKS:
+        BENCHMARKS[name](results, args.steps, args.repeats)
+
+    _print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
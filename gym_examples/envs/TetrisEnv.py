@@ -1,18 +1,40 @@
 import time
 
 import gymnasium as gym
-import pygame
 import numpy as np
 from gymnasium import spaces
-from tetris import Piece, create_grid, get_shape, draw_window, clear_rows, valid_space, check_lost, convert_shape_format
+from gym_examples.envs.tetris import Piece, shapes, get_shape
+from gym_examples.envs.step_stats import StepStats
+from gym_examples.envs.afterstates import afterstates
+from gym_examples.envs.tetris_raster import TetrisRasterizer, palette_rgb
+from gym_examples.envs.bitboard import (Board, board_width, board_height, rotation_counts, feature_names,
+                                        shape_min_dx)
 from gymnasium.utils import seeding
-from typing import Tuple
+from typing import NamedTuple, Tuple
+
+
+# TetrisEnv的最小游戏状态，用于clone_state/restore_state
+class TetrisState(NamedTuple):
+    board: tuple  # Board.snapshot()
+    current: tuple  # 当前方块(形状编号, 旋转, x, y)
+    next_shape: int
+    score: int
+    change_piece: bool
+    run: bool
+    fall_time: float
+    level_time: float
+    fall_speed: float
+    rng_state: dict  # np_random.bit_generator.state
 
 
 class TetrisEnv(gym.Env):
-    metadata = {'render_modes': ['human', 'rgb_array']}
+    metadata = {'render_modes': ['human', 'rgb_array', 'viewer'], 'render_fps': 60,
+                'gravity_modes': ['realtime', 'ticks'],
+                'obs_modes': ['grid', 'occupancy', 'bitpacked', 'struct', 'features', 'pixels'],
+                'action_modes': ['move', 'placement']}
 
-    def __init__(self, render_mode=None):
+    def __init__(self, render_mode=None, gravity='realtime', frames_per_step=1, obs_mode='grid', instrument=False,
+                 info_features=False, action_mode='move', cell_size=4, grayscale=False, downsample=1):
         super(TetrisEnv, self).__init__()
 
         # 定义屏幕和游戏区的尺寸
@@ -26,15 +48,63 @@ class TetrisEnv(gym.Env):
         self.top_left_x = (self.screen_width - self.play_width) // 2
         self.top_left_y = self.screen_height - self.play_height
 
-        # 定义动作空间：左、右、旋转、下
-        self.action_space = spaces.Discrete(4)
-        # 定义观测空间：屏幕的RGB图像
-        self.observation_space = spaces.Box(low=0, high=255, shape=(self.screen_height, self.screen_width, 3),
-                                            dtype=np.uint8)
+        # 定义动作空间，取决于动作模式：
+        # "move"：左、右、旋转、下
+        # "placement"：动作rotation * board_width + column直接选择方块的最终位置，
+        # column是方块最左边一格所在的列；方块从出生位置平移、旋转后硬降并立即锁定，
+        # 每一步放置一个方块。info['action_mask']（以及action_masks()）标出合法的放置，
+        # 不合法的动作按不移动处理，方块从出生位置直接硬降
+        assert action_mode in self.metadata['action_modes']
+        self.action_mode = action_mode
+        if action_mode == 'placement':
+            self.action_space = spaces.Discrete(4 * board_width)
+        else:
+            self.action_space = spaces.Discrete(4)
+        # 定义观测空间，取决于观测模式：
+        # "grid"：20x10x3的uint8 RGB数组，每格的颜色与create_grid的网格相同（旧的嵌套列表见grid属性）
+        # "occupancy"：20x10 uint8数组，0为空格，k为第k-1种形状
+        # "bitpacked"：20个uint16，每行一个位掩码，第c位对应第c列
+        # "struct"：已锁定的棋盘加上当前方块(形状, 旋转, x, y)和下一个方块
+        # "features"：已锁定棋盘的特征向量（各列高度、总高度、空洞数、高度差之和、行变换数），
+        # 顺序见bitboard.feature_names，由棋盘在锁定和消行时增量维护
+        # "pixels"：不经过pygame、用NumPy直接放大格子得到的游戏区图像（含当前方块），每格cell_size像素，
+        # 可选灰度和按downsample降采样，形状见TetrisRasterizer.shape
+        # 观测都写入预先分配的缓冲区，下一次step时会被覆盖
+        assert obs_mode in self.metadata['obs_modes']
+        self.obs_mode = obs_mode
+        self.rasterizer = None
+        if obs_mode == 'pixels':
+            self.rasterizer = TetrisRasterizer(cell_size, grayscale, downsample)
+        num_shapes = len(rotation_counts)
+        if obs_mode == 'occupancy':
+            self.observation_space = spaces.Box(low=0, high=num_shapes, shape=(board_height, board_width),
+                                                dtype=np.uint8)
+        elif obs_mode == 'bitpacked':
+            self.observation_space = spaces.Box(low=0, high=(1 << board_width) - 1, shape=(board_height,),
+                                                dtype=np.uint16)
+        elif obs_mode == 'struct':
+            self.observation_space = spaces.Dict({
+                'board': spaces.Box(low=0, high=num_shapes, shape=(board_height, board_width), dtype=np.uint8),
+                'current': spaces.Box(low=np.array([0, 0, -2, 0]),
+                                      high=np.array([num_shapes - 1, 3, board_width + 2, board_height + 4]),
+                                      dtype=np.int64),
+                'next': spaces.Discrete(num_shapes),
+            })
+        elif obs_mode == 'features':
+            self.observation_space = spaces.Box(low=0, high=board_height * (board_width + 1),
+                                                shape=(len(feature_names),), dtype=np.int64)
+        elif obs_mode == 'pixels':
+            self.observation_space = spaces.Box(low=0, high=255, shape=self.rasterizer.shape, dtype=np.uint8)
+        else:
+            self.observation_space = spaces.Box(low=0, high=255, shape=(board_height, board_width, 3), dtype=np.uint8)
+        self._obs = self._allocate_obs()
+        # 为True时在info['features']中返回同样的特征向量（每次返回新数组）
+        self.info_features = info_features
 
         # 初始化实例属性
-        self.locked_positions = None
-        self.grid = None
+        self.board = Board()  # 位掩码棋盘，存储已锁定的方块
+        # placement模式的碰撞检测入口，开启统计时单独计入"fits"阶段
+        self._fits = self.board.fits
         self.current_piece = None
         self.next_piece = None
         self.score = None
@@ -43,10 +113,30 @@ class TetrisEnv(gym.Env):
         self.fall_time = None
         self.level_time = None
         self.fall_speed = None
-        self.clock = None
+        self.last_time = None  # realtime模式下上一步的时间
         self.win = None
+        self.renderer = None  # 第一次render时创建
+        self.render_clock = None
+        self._render_cells = None
+        # "viewer"模式：render只把格子和得分发布给独立的显示进程，不等待显示
+        self.viewer = None
+        self._viewer_state = None
         self.render_mode = render_mode
 
+        # 重力模式："realtime"按墙钟时间下落，"ticks"按环境步数下落，
+        # 每一步相当于frames_per_step帧，结果与运行速度无关、可以复现
+        assert gravity in self.metadata['gravity_modes']
+        assert frames_per_step > 0
+        self.gravity = gravity
+        self.frames_per_step = frames_per_step
+        self.step_ms = frames_per_step * 1000 / self.metadata['render_fps']  # 每一步对应的毫秒数
+
+        # 可选的分阶段统计，关闭时不包装任何函数
+        self.step_stats = None
+        if instrument:
+            self.step_stats = StepStats()
+            self._instrument()
+
         self.seed()
         self.reset()
 
@@ -58,34 +148,147 @@ class TetrisEnv(gym.Env):
         super().reset(seed=seed)
 
         # 重置游戏状态
-        self.locked_positions = {}  # 存储已锁定方块的位置
-        self.grid = create_grid(self.locked_positions)  # 创建初始网格
-        self.current_piece = get_shape()  # 获取当前方块
-        self.next_piece = get_shape()  # 获取下一个方块
+        self.board.reset()  # 清空棋盘
+        self.current_piece = get_shape(self.np_random)  # 获取当前方块
+        self.next_piece = get_shape(self.np_random)  # 获取下一个方块
         self.score = 0  # 初始化得分
         self.change_piece = False  # 是否需要更换方块
         self.run = True  # 游戏是否进行中
         self.fall_time = 0  # 方块下落的时间
         self.level_time = 0  # 游戏等级的时间
         self.fall_speed = 0.27  # 初始下落速度
-        self.clock = pygame.time.Clock()  # 初始化时钟
+        self.last_time = None  # 第一步不计时
 
         # 创建游戏窗口
         if self.win is None and self.render_mode == 'human':
-            self.win = pygame.display.set_mode((self.screen_width, self.screen_height))
-            pygame.display.set_caption('Tetris')
+            self._open_window()
+
+        return self._get_obs(), self._get_info()
 
+    # 网格：已锁定的方块加上当前方块，格式与create_grid相同
+    @property
+    def grid(self):
+        return self.board.to_grid(self.current_piece)
 
-        return self.grid, {}
+    def _allocate_obs(self):
+        if self.obs_mode == 'occupancy':
+            return np.zeros((board_height, board_width), dtype=np.uint8)
+        if self.obs_mode == 'bitpacked':
+            return np.zeros(board_height, dtype=np.uint16)
+        if self.obs_mode == 'struct':
+            return {'board': np.zeros((board_height, board_width), dtype=np.uint8),
+                    'current': np.zeros(4, dtype=np.int64),
+                    'next': 0}
+        if self.obs_mode == 'features':
+            return np.zeros(len(feature_names), dtype=np.int64)
+        if self.obs_mode == 'pixels':
+            self._pixel_cells = np.zeros((board_height, board_width), dtype=np.uint8)
+            return np.zeros(self.rasterizer.shape, dtype=np.uint8)
+        self._grid_cells = np.zeros((board_height, board_width), dtype=np.uint8)
+        return np.zeros((board_height, board_width, 3), dtype=np.uint8)
+
+    def _get_obs(self):
+        obs = self._obs
+        if self.obs_mode == 'occupancy':
+            return self.board.write_cells(obs, self.current_piece)
+        if self.obs_mode == 'bitpacked':
+            return self.board.write_packed(obs, self.current_piece)
+        if self.obs_mode == 'struct':
+            piece = self.current_piece
+            np.copyto(obs['board'], self.board.cells)
+            current = obs['current']
+            current[0] = piece.shape_id
+            current[1] = piece.rotation
+            current[2] = piece.x
+            current[3] = piece.y
+            obs['next'] = self.next_piece.shape_id
+            return obs
+        if self.obs_mode == 'features':
+            return self.board.features(obs)
+        if self.obs_mode == 'pixels':
+            cells = self.board.write_cells(self._pixel_cells, self.current_piece)
+            return self.rasterizer.draw(cells, out=obs)
+        cells = self.board.write_cells(self._grid_cells, self.current_piece)
+        return np.take(palette_rgb, cells, axis=0, out=obs)
 
     def step(self, action):
         reward = 0
         terminated = False
         truncated = False
 
-        self.fall_time += self.clock.get_rawtime()
-        self.level_time += self.clock.get_rawtime()
-        self.clock.tick()
+        if self.action_mode == 'placement':
+            reward += self._place(action)
+        else:
+            self._apply_gravity()
+            self._handle_input(action)
+
+            # 检查是否需要更换方块
+            if self.change_piece:
+                reward += self._lock_piece()
+
+        # 检查游戏是否结束
+        if self.board.check_lost():
+            self.run = False
+            reward -= 50
+            terminated = True
+
+        info = self._get_info()
+        if self.step_stats is not None:
+            info['stats'] = self.stats()
+
+        return self._get_obs(), reward, terminated, truncated, info
+
+    def _get_info(self):
+        info = {}
+        if self.info_features:
+            info['features'] = self.board.features()
+        if self.action_mode == 'placement':
+            info['action_mask'] = self.action_masks()
+        return info
+
+    # placement模式下每个动作是否合法：旋转数不超过该形状的旋转数，
+    # 且方块在出生的高度上平移、旋转到该位置时不越界、不重叠
+    def action_masks(self):
+        piece = self.current_piece
+        shape_id = piece.shape_id
+        fits = self._fits
+        mask = np.zeros(4 * board_width, dtype=np.int8)
+        for rotation in range(rotation_counts[shape_id]):
+            min_dx = shape_min_dx[shape_id, rotation]
+            for column in range(board_width):
+                if fits(shape_id, rotation, column - min_dx, piece.y):
+                    mask[rotation * board_width + column] = 1
+        return mask
+
+    # 当前方块全部合法放置的结果（见afterstates.afterstates），动作编号与placement模式相同
+    def afterstates(self):
+        piece = self.current_piece
+        return afterstates(self.board.cells, piece.shape_id, piece.y)
+
+    # placement模式：把当前方块放到动作选择的位置，硬降、锁定并消行，返回消行的奖励
+    def _place(self, action):
+        piece = self.current_piece
+        fits = self._fits
+        rotation, column = divmod(int(action), board_width)
+        if rotation < rotation_counts[piece.shape_id]:
+            x = column - int(shape_min_dx[piece.shape_id, rotation])
+            if fits(piece.shape_id, rotation, x, piece.y):
+                piece.rotation = rotation
+                piece.x = x
+        while fits(piece.shape_id, piece.rotation, piece.x, piece.y + 1):
+            piece.y += 1
+        return self._lock_piece()
+
+    # 重力：推进计时器，到时间后方块下落一格，无法下落时标记需要更换方块
+    def _apply_gravity(self):
+        if self.gravity == 'ticks':
+            elapsed = self.step_ms
+        else:
+            now = time.perf_counter()
+            elapsed = 0 if self.last_time is None else (now - self.last_time) * 1000
+            self.last_time = now
+        self.fall_time += elapsed
+        self.level_time += elapsed
 
         # 每经过5秒，增加游戏难度
         if self.level_time / 1000 > 5:
@@ -97,81 +300,148 @@ class TetrisEnv(gym.Env):
         if self.fall_time / 1000 >= self.fall_speed:
             self.fall_time = 0
             self.current_piece.y += 1
-            if not valid_space(self.current_piece, self.grid) and self.current_piece.y > 0:
+            if not self.board.valid_space(self.current_piece) and self.current_piece.y > 0:
                 self.current_piece.y -= 1
                 self.change_piece = True
 
-        # 根据动作移动方块
+    # 根据动作移动方块
+    def _handle_input(self, action):
         if action == 0:  # 左
             self.current_piece.x -= 1
-            if not valid_space(self.current_piece, self.grid):
+            if not self.board.valid_space(self.current_piece):
                 self.current_piece.x += 1
         elif action == 1:  # 右
             self.current_piece.x += 1
-            if not valid_space(self.current_piece, self.grid):
+            if not self.board.valid_space(self.current_piece):
                 self.current_piece.x -= 1
         elif action == 2:  # 旋转
             self.current_piece.rotation = (self.current_piece.rotation + 1) % len(self.current_piece.shape)
-            if not valid_space(self.current_piece, self.grid):
+            if not self.board.valid_space(self.current_piece):
                 self.current_piece.rotation = (self.current_piece.rotation - 1) % len(self.current_piece.shape)
-            else:
-                # 打印旋转后的形状位置
-                shape_pos = convert_shape_format(self.current_piece)
-                print("Rotated shape positions:", shape_pos)
         elif action == 3:  # 下
             self.current_piece.y += 1
-            if not valid_space(self.current_piece, self.grid):
+            if not self.board.valid_space(self.current_piece):
                 self.current_piece.y -= 1
 
-        # 获取方块的坐标位置
-        shape_pos = convert_shape_format(self.current_piece)
-
-        # 更新网格
-        for i in range(len(shape_pos)):
-            x, y = shape_pos[i]
-            if y > -1:
-                self.grid[y][x] = self.current_piece.color
-
-        # 检查是否需要更换方块
-        if self.change_piece:
-            for pos in shape_pos:
-                p = (pos[0], pos[1])
-                self.locked_positions[p] = self.current_piece.color
-            self.current_piece = self.next_piece
-            self.next_piece = get_shape()
-            self.change_piece = False
-            reward += clear_rows(self.grid, self.locked_positions) * 10
+    # 锁定当前方块、换下一个方块并消行，返回消行的奖励
+    def _lock_piece(self):
+        self.board.lock(self.current_piece)
+        self.current_piece = self.next_piece
+        self.next_piece = get_shape(self.np_random)
+        self.change_piece = False
+        return self.board.clear_rows() * 10
 
-        # 检查游戏是否结束
-        if check_lost(self.locked_positions):
-            self.run = False
-            reward -= 50
-            terminated = True
+    # 开启统计时，用计时的版本替换各阶段的函数
+    def _instrument(self):
+        stats = self.step_stats
+        self._apply_gravity = stats.timed('gravity', self._apply_gravity)
+        self._handle_input = stats.timed('input', self._handle_input)
+        self._place = stats.timed('place', self._place)
+        self.board.valid_space = stats.timed('valid_space', self.board.valid_space)
+        self._fits = stats.timed('fits', self._fits)
+        self.board.lock = stats.timed('lock', self.board.lock)
+        self.board.clear_rows = stats.timed('clear_rows', self.board.clear_rows, counter='lines_cleared')
+        self.render = stats.timed('render', self.render)
+
+    # 各阶段的累计耗时和调用次数，以及消除的行数和放置的方块数
+    def stats(self):
+        if self.step_stats is None:
+            return {}
+        stats = self.step_stats.as_dict()
+        stats['pieces_placed'] = stats['lock_calls']
+        return stats
 
-        # 调试信息
-        print("Action:", action)
-        print("Current piece position:", self.current_piece.x, self.current_piece.y)
-        print("------")
+    # 保存当前游戏状态的快照，供搜索和规划算法分支使用
+    def clone_state(self) -> TetrisState:
+        piece = self.current_piece
+        return TetrisState(
+            board=self.board.snapshot(),
+            current=(piece.shape_id, piece.rotation, piece.x, piece.y),
+            next_shape=self.next_piece.shape_id,
+            score=self.score,
+            change_piece=self.change_piece,
+            run=self.run,
+            fall_time=self.fall_time,
+            level_time=self.level_time,
+            fall_speed=self.fall_speed,
+            rng_state=self.np_random.bit_generator.state,
+        )
 
-        return self.grid, reward, terminated, truncated, {}
+    # 恢复clone_state保存的快照
+    def restore_state(self, state: TetrisState):
+        self.board.restore(state.board)
+        shape_id, rotation, x, y = state.current
+        self.current_piece = Piece(x, y, shapes[shape_id])
+        self.current_piece.rotation = rotation
+        self.next_piece = Piece(5, 0, shapes[state.next_shape])
+        self.score = state.score
+        self.change_piece = state.change_piece
+        self.run = state.run
+        self.fall_time = state.fall_time
+        self.level_time = state.level_time
+        self.fall_speed = state.fall_speed
+        self.np_random.bit_generator.state = state.rng_state
+
+    # pygame只在需要渲染时才导入和初始化
+    def _open_window(self):
+        import pygame
+
+        pygame.display.init()
+        self.win = pygame.display.set_mode((self.screen_width, self.screen_height))
+        pygame.display.set_caption('Tetris')
 
     def render(self):
+        if self.render_mode is None:
+            return None
+        if self.render_mode == 'viewer':
+            return self._publish()
+        import pygame
+        from gym_examples.envs.tetris_renderer import TetrisRenderer
+
+        if self.renderer is None:
+            if self.render_mode == 'human':
+                if self.win is None:
+                    self._open_window()
+                surface = self.win
+            else:
+                surface = pygame.Surface((self.screen_width, self.screen_height))
+            self.renderer = TetrisRenderer(surface)
+            self.render_clock = pygame.time.Clock()
+            self._render_cells = np.zeros((board_height, board_width), dtype=np.uint8)
+
+        cells = self.board.write_cells(self._render_cells, self.current_piece)
+        self.renderer.draw(cells, self.score)
         if self.render_mode == 'human':
-            if self.win is None:
-                self.win = pygame.display.set_mode((self.screen_width, self.screen_height))
-                pygame.display.set_caption('Tetris')
-            draw_window(self.win, self.grid, self.score)
-            pygame.display.update()
-            time.sleep(1)
-        elif self.render_mode == 'rgb_array':
-            canvas = pygame.Surface((self.screen_width, self.screen_height))
-            draw_window(canvas, self.grid, self.score)
-            return np.transpose(
-                np.array(pygame.surfarray.pixels3d(canvas)), axes=(1, 0, 2)
-            )
+            # 只更新发生变化的区域，并按render_fps控制帧率
+            pygame.event.pump()
+            pygame.display.update(self.renderer.dirty)
+            self.render_clock.tick(self.metadata['render_fps'])
+        else:
+            return self.renderer.to_rgb_array()
+
+    def _publish(self):
+        if self.viewer is None:
+            from gym_examples.envs.shared_viewer import SharedMemoryViewer, TetrisDrawer
+
+            size = board_height * board_width + 1
+            self.viewer = SharedMemoryViewer(size, np.int32, TetrisDrawer(), fps=self.metadata['render_fps'],
+                                             caption='Tetris')
+            self._viewer_state = np.zeros(size, dtype=np.int32)
+        state = self._viewer_state
+        self.board.write_cells(state[:-1].reshape(board_height, board_width), self.current_piece)
+        state[-1] = self.score
+        self.viewer.publish(state)
 
     def close(self):
-        pygame.quit()
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+        if self.win is not None or self.renderer is not None:
+            import pygame
+
+            pygame.quit()
+            self.win = None
+            self.renderer = None
 
 
 if __name__ == "__main__":
@@ -1 +1,20 @@
-from gym_examples.envs.grid_world import GridWorldEnv
+import importlib
+
+# 环境按需导入：导入其中一个环境时不会连带导入其他环境模块
+_lazy_imports = {
+    "GridWorldEnv": "gym_examples.envs.grid_world",
+    "GridMap": "gym_examples.envs.grid_map",
+    "GridWorldModel": "gym_examples.envs.grid_world_model",
+    "VectorGridWorldEnv": "gym_examples.envs.vector_grid_world",
+    "VectorTetrisEnv": "gym_examples.envs.vector_tetris",
+}
+
+__all__ = list(_lazy_imports)
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
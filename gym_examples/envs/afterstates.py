@@ -0,0 +1,132 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from gym_examples.envs.bitboard import (
+    board_width,
+    board_height,
+    rotation_counts,
+    shape_cells,
+    shape_min_dx,
+    feature_names,
+)
+
+# 所有放置动作的预编译表，动作编号与TetrisEnv的placement模式相同：rotation * board_width + column。
+# placement_cols[s, a, k]和placement_dys[s, a, k]是形状s按动作a放置时第k格的列和相对y的行偏移
+num_placements = 4 * board_width
+_rotations, _columns = np.divmod(np.arange(num_placements), board_width)
+placement_x = _columns[None, :] - shape_min_dx[:, _rotations]  # (形状, 动作)对应的方块x
+placement_cols = placement_x[:, :, None] + shape_cells[..., 0][:, _rotations]
+placement_dys = shape_cells[..., 1][:, _rotations]
+# 与棋盘无关的合法性：旋转数不超过该形状的旋转数，且方块不超出右边界
+placement_valid = (_rotations[None, :] < rotation_counts[:, None]) & (
+    placement_cols.max(axis=2) < board_width
+)
+
+
+class Afterstates(NamedTuple):
+    actions: np.ndarray  # placement动作编号
+    x: np.ndarray  # 方块落地时的x
+    y: np.ndarray  # 方块落地时的y
+    boards: np.ndarray  # 锁定并消行后的棋盘，uint8，0为空格，k为第k-1种形状
+    lines: np.ndarray  # 消除的行数
+    rewards: np.ndarray  # 与TetrisEnv相同的奖励：消行数 * 10，游戏结束时 - 50
+    lost: np.ndarray  # 放置后游戏是否结束
+    features: np.ndarray  # 放置后棋盘的特征，顺序见bitboard.feature_names
+
+
+# 批量计算棋盘特征，boards的形状为(..., board_height, board_width)，结果与Board.features()相同
+def board_features(boards):
+    occupied = boards != 0
+    top = np.where(occupied.any(axis=-2), occupied.argmax(axis=-2), board_height)
+    heights = board_height - top
+    aggregate = heights.sum(axis=-1)
+    holes = aggregate - occupied.sum(axis=(-2, -1))
+    bumpiness = np.abs(np.diff(heights, axis=-1)).sum(axis=-1)
+    walls = np.ones(occupied.shape[:-1] + (1,), dtype=bool)
+    walled = np.concatenate([walls, occupied, walls], axis=-1)
+    transitions = (walled[..., 1:] != walled[..., :-1]).sum(axis=(-2, -1))
+    out = np.empty(occupied.shape[:-2] + (len(feature_names),), dtype=np.int64)
+    out[..., :board_width] = heights
+    out[..., board_width] = aggregate
+    out[..., board_width + 1] = holes
+    out[..., board_width + 2] = bumpiness
+    out[..., board_width + 3] = transitions
+    return out
+
+
+# 对B个棋盘同时枚举全部num_placements个放置动作。boards的形状为(B, board_height, board_width)，
+# shape_ids和y的形状为(B,)（y是方块开始硬降的高度，默认为出生位置0）。
+# 返回的各项形状为(B, num_placements, ...)，另外返回(B, num_placements)的合法性掩码；
+# 不合法的位置上的结果没有意义
+def batch_afterstates(boards, shape_ids, y=None):
+    boards = np.asarray(boards, dtype=np.uint8)
+    shape_ids = np.asarray(shape_ids, dtype=np.int64)
+    n = len(boards)
+    y = np.zeros(n, dtype=np.int64) if y is None else np.asarray(y, dtype=np.int64)
+    cols = placement_cols[shape_ids]  # (B, A, 4)
+    dys = placement_dys[shape_ids]
+    valid = placement_valid[shape_ids].copy()
+    safe_cols = np.clip(cols, 0, board_width - 1)
+    b = np.arange(n)[:, None, None]
+
+    # next_filled[b, r, c]：第c列中第r行及以下第一个被占用的行，没有时为board_height
+    occupied = boards != 0
+    rows = np.where(occupied, np.arange(board_height)[:, None], board_height)
+    next_filled = np.minimum.accumulate(rows[:, ::-1], axis=1)[:, ::-1]
+    next_filled = np.concatenate(
+        [next_filled, np.full((n, 1, board_width), board_height)], axis=1
+    )
+
+    # 开始位置不能与已锁定的方块重叠；游戏区上方的行都是空的
+    start = y[:, None, None] + dys
+    start_row = np.clip(start, 0, board_height)
+    below = next_filled[b, start_row, safe_cols]
+    valid &= ((start < 0) | (below != start)).all(axis=2) & (start < board_height).all(
+        axis=2
+    )
+    # 硬降：每一格最多下落到它下方第一个被占用的格子之上
+    landing = np.maximum((below - 1 - dys).min(axis=2), y[:, None])
+    final_rows = landing[:, :, None] + dys
+
+    # 锁定：游戏区上方的格子不写入棋盘，但会导致游戏结束
+    result = np.repeat(boards[:, None], num_placements, axis=1)
+    topped_out = (final_rows < 0).any(axis=2)
+    in_field = final_rows >= 0
+    a = np.broadcast_to(np.arange(num_placements)[None, :, None], cols.shape)
+    result[
+        np.broadcast_to(b, cols.shape)[in_field],
+        a[in_field],
+        final_rows[in_field],
+        safe_cols[in_field],
+    ] = np.broadcast_to((shape_ids + 1)[:, None, None], cols.shape)[in_field]
+
+    # 消行：满行移到顶部并清零，其余行保持顺序下移
+    flat = result.reshape(-1, board_height, board_width)
+    full = (flat != 0).all(axis=2)
+    lines = full.sum(axis=1)
+    cleared = lines > 0
+    if cleared.any():
+        order = np.argsort(~full[cleared], axis=1, kind="stable")
+        compacted = np.take_along_axis(flat[cleared], order[:, :, None], axis=1)
+        compacted[np.arange(board_height) < lines[cleared, None]] = 0
+        flat[cleared] = compacted
+    lines = lines.reshape(n, num_placements)
+
+    lost = topped_out | (result[:, :, 0] != 0).any(axis=2)
+    rewards = lines * 10 - 50 * lost
+    actions = np.broadcast_to(np.arange(num_placements), (n, num_placements))
+    x = placement_x[shape_ids]
+    return (
+        Afterstates(
+            actions, x, landing, result, lines, rewards, lost, board_features(result)
+        ),
+        valid,
+    )
+
+
+# 枚举一个棋盘上形状shape_id的全部合法放置，返回的各项按合法动作堆叠，第一维长度相同
+def afterstates(board, shape_id, y=0):
+    result, valid = batch_afterstates(board[None], [shape_id], [y])
+    keep = valid[0]
+    return Afterstates(*(field[0][keep] for field in result))
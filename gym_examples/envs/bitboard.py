@@ -0,0 +1,299 @@
+import numpy as np
+
+from gym_examples.envs.tetris import shapes, shape_colors
+
+# 棋盘大小（与tetris.py中的10x20网格一致）
+board_width = 10
+board_height = 20
+
+# 每行用一个整数位掩码表示，第c列对应第(c + pad)位；
+# 游戏区以外的位全部置1作为"墙"，这样越界和重叠检测都只需要一次与运算
+pad = 4
+field_mask = ((1 << board_width) - 1) << pad
+empty_row = ((1 << 32) - 1) ^ field_mask
+full_row = (1 << 32) - 1
+
+# 行内相邻两格（含两侧的墙）之间的位，用于统计行变换数
+transition_mask = ((1 << (board_width + 1)) - 1) << (pad - 1)
+
+
+# 一行中相邻格子一空一满的次数，两侧的墙算作满格
+def row_transitions(row):
+    return bin((row ^ (row >> 1)) & transition_mask).count("1")
+
+
+# Board.features()中各项的名称
+feature_names = tuple(f"height_{c}" for c in range(board_width)) + (
+    "aggregate_height",
+    "holes",
+    "bumpiness",
+    "row_transitions",
+)
+
+
+# 预编译形状模板：shape_id -> rotation -> [(模板行i, 行掩码)]
+# 行掩码的第j位对应模板的第j列，与convert_shape_format中的(-2, -4)偏移配合使用
+def _compile_shape(shape):
+    rotations = []
+    for format in shape:
+        masks = []
+        for i, line in enumerate(format):
+            mask = 0
+            for j, column in enumerate(line):
+                if column == "0":
+                    mask |= 1 << j
+            if mask:
+                masks.append((i - 4, mask))
+        rotations.append(tuple(masks))
+    return tuple(rotations)
+
+
+shape_masks = tuple(_compile_shape(shape) for shape in shapes)
+
+# 颜色平面中0表示空格，k表示第k-1种形状的颜色
+cell_colors = [(0, 0, 0)] + list(shape_colors)
+
+
+class Board:
+    def __init__(self):
+        self.rows = None  # 每行的位掩码（含墙）
+        self.cells = None  # 颜色平面，uint8，0为空
+        self.topped_out = False  # 是否有方块锁定在游戏区上方
+        # 随锁定和消行增量维护的特征，每一步的代价只与变化的格子数有关
+        self.heights = None  # 每列的高度
+        self.aggregate_height = 0
+        self.filled = 0  # 已锁定的格子数，空洞数 = aggregate_height - filled
+        self.bumpiness = 0  # 相邻列高度差的绝对值之和
+        self.row_transitions = 0  # 所有行的行变换数之和
+        self.reset()
+
+    def reset(self):
+        self.rows = [empty_row] * board_height
+        self.cells = np.zeros((board_height, board_width), dtype=np.uint8)
+        self.topped_out = False
+        self._recompute_features()
+
+    # 从棋盘完整地重新计算特征，只在reset时使用
+    def _recompute_features(self):
+        occupied = self.cells != 0
+        top = np.where(occupied.any(axis=0), occupied.argmax(axis=0), board_height)
+        self.heights = (board_height - top).tolist()
+        self.aggregate_height = sum(self.heights)
+        self.filled = int(occupied.sum())
+        self.bumpiness = int(np.abs(np.diff(self.heights)).sum())
+        self.row_transitions = sum(row_transitions(row) for row in self.rows)
+
+    @property
+    def holes(self):
+        return self.aggregate_height - self.filled
+
+    # 把特征写入out（int64数组，顺序见feature_names）
+    def features(self, out=None):
+        if out is None:
+            out = np.zeros(len(feature_names), dtype=np.int64)
+        out[:board_width] = self.heights
+        out[board_width] = self.aggregate_height
+        out[board_width + 1] = self.aggregate_height - self.filled
+        out[board_width + 2] = self.bumpiness
+        out[board_width + 3] = self.row_transitions
+        return out
+
+    # 修改第c列的高度，同时更新与相邻两列的高度差
+    def _set_height(self, c, height):
+        heights = self.heights
+        old = heights[c]
+        if c > 0:
+            self.bumpiness += abs(height - heights[c - 1]) - abs(old - heights[c - 1])
+        if c < board_width - 1:
+            self.bumpiness += abs(height - heights[c + 1]) - abs(old - heights[c + 1])
+        self.aggregate_height += height - old
+        heights[c] = height
+
+    # 棋盘的不可变快照：(行掩码, 颜色平面的字节, 是否有方块锁定在游戏区上方, 各列高度,
+    # aggregate_height, filled, bumpiness, row_transitions)。特征一起保存，恢复时不需要重新扫描棋盘
+    def snapshot(self):
+        return (
+            tuple(self.rows),
+            self.cells.tobytes(),
+            self.topped_out,
+            tuple(self.heights),
+            self.aggregate_height,
+            self.filled,
+            self.bumpiness,
+            self.row_transitions,
+        )
+
+    def restore(self, snapshot):
+        (
+            rows,
+            cells,
+            self.topped_out,
+            heights,
+            self.aggregate_height,
+            self.filled,
+            self.bumpiness,
+            self.row_transitions,
+        ) = snapshot
+        self.rows = list(rows)
+        self.cells = (
+            np.frombuffer(cells, dtype=np.uint8)
+            .reshape(board_height, board_width)
+            .copy()
+        )
+        self.heights = list(heights)
+
+    # 检查方块位置是否合法，对应tetris.valid_space
+    def valid_space(self, piece):
+        return self.fits(piece.shape_id, piece.rotation, piece.x, piece.y)
+
+    def fits(self, shape_id, rotation, x, y):
+        masks = shape_masks[shape_id]
+        shift = x - 2 + pad
+        if shift < 0:
+            return False
+        rows = self.rows
+        for dy, mask in masks[rotation % len(masks)]:
+            r = y + dy
+            if r >= board_height:
+                return False
+            # 游戏区上方的行只有墙，没有已锁定的方块
+            row = rows[r] if r >= 0 else empty_row
+            if row & (mask << shift):
+                return False
+        return True
+
+    # 把方块锁定到棋盘上
+    def lock(self, piece):
+        masks = shape_masks[piece.shape_id]
+        shift = piece.x - 2 + pad
+        color = piece.shape_id + 1
+        rows = self.rows
+        cells = self.cells
+        for dy, mask in masks[piece.rotation % len(masks)]:
+            r = piece.y + dy
+            if r < 0:
+                self.topped_out = True
+                continue
+            old = rows[r]
+            rows[r] = old | mask << shift
+            self.row_transitions += row_transitions(rows[r]) - row_transitions(old)
+            height = board_height - r
+            bits = mask
+            c = piece.x - 2
+            while bits:
+                if bits & 1:
+                    cells[r, c] = color
+                    self.filled += 1
+                    if height > self.heights[c]:
+                        self._set_height(c, height)
+                bits >>= 1
+                c += 1
+
+    # 清除已满的行，返回清除的行数，对应tetris.clear_rows
+    def clear_rows(self):
+        rows = self.rows
+        kept = [i for i in range(board_height) if rows[i] != full_row]
+        increment = board_height - len(kept)
+        if increment > 0:
+            self.rows = [empty_row] * increment + [rows[i] for i in kept]
+            cells = np.zeros_like(self.cells)
+            cells[increment:] = self.cells[kept]
+            self.cells = cells
+            # 被消除的行是满行，每列的最高格都不低于它们，所以每列高度先减少increment，
+            # 高度差不变；满行的行变换数为0，新加入的空行各有2次
+            self.heights = [h - increment for h in self.heights]
+            self.aggregate_height -= increment * board_width
+            self.filled -= increment * board_width
+            self.row_transitions += 2 * increment
+            # 最高格被消除的列，新的顶端可能是原来被盖住的空洞，需要向下找到下一个方块
+            for c in range(board_width):
+                height = self.heights[c]
+                while height > 0 and not cells[board_height - height, c]:
+                    height -= 1
+                if height != self.heights[c]:
+                    self._set_height(c, height)
+        return increment
+
+    # 检查游戏结束，对应tetris.check_lost
+    def check_lost(self):
+        return self.topped_out or self.rows[0] != empty_row
+
+    # 把占用/形状编号平面写入out（20x10 uint8），并叠加当前方块
+    def write_cells(self, out, piece=None):
+        np.copyto(out, self.cells)
+        if piece is not None:
+            masks = shape_masks[piece.shape_id]
+            color = piece.shape_id + 1
+            for dy, mask in masks[piece.rotation % len(masks)]:
+                r = piece.y + dy
+                if r < 0 or r >= board_height:
+                    continue
+                for j in range(5):
+                    if mask >> j & 1:
+                        out[r, piece.x - 2 + j] = color
+        return out
+
+    # 把每行的占用位写入out（20个uint16，第c位对应第c列），并叠加当前方块
+    def write_packed(self, out, piece=None):
+        width_mask = (1 << board_width) - 1
+        rows = self.rows
+        for r in range(board_height):
+            out[r] = rows[r] >> pad & width_mask
+        if piece is not None:
+            masks = shape_masks[piece.shape_id]
+            shift = piece.x - 2
+            for dy, mask in masks[piece.rotation % len(masks)]:
+                r = piece.y + dy
+                if 0 <= r < board_height:
+                    out[r] |= (
+                        mask << shift if shift >= 0 else mask >> -shift
+                    ) & width_mask
+        return out
+
+    # 已锁定方块的位置和颜色，格式与locked_positions相同
+    def locked_positions(self):
+        ys, xs = np.nonzero(self.cells)
+        return {
+            (x, y): cell_colors[self.cells[y, x]]
+            for x, y in zip(xs.tolist(), ys.tolist())
+        }
+
+    # 生成与create_grid相同格式的网格，并叠加当前方块
+    def to_grid(self, piece=None):
+        grid = [[cell_colors[c] for c in row] for row in self.cells.tolist()]
+        if piece is not None:
+            masks = shape_masks[piece.shape_id]
+            for dy, mask in masks[piece.rotation % len(masks)]:
+                r = piece.y + dy
+                if r < 0 or r >= board_height:
+                    continue
+                for j in range(5):
+                    if mask >> j & 1:
+                        grid[r][piece.x - 2 + j] = piece.color
+        return grid
+
+
+# 每种形状的旋转数
+rotation_counts = np.array([len(shape) for shape in shapes], dtype=np.int64)
+
+
+# 预编译的方块偏移表：shape_cells[shape_id, rotation, k] = (dx, dy)，
+# 方块第k格位于(x + dx, y + dy)；旋转数不足4的形状按rotation % len(shape)填充
+def _compile_cells():
+    cells = np.zeros((len(shapes), 4, 4, 2), dtype=np.int64)
+    for s, shape in enumerate(shapes):
+        for r in range(4):
+            format = shape[r % len(shape)]
+            cells[s, r] = [
+                (j - 2, i - 4)
+                for i, line in enumerate(format)
+                for j, column in enumerate(line)
+                if column == "0"
+            ]
+    return cells
+
+
+shape_cells = _compile_cells()
+
+# 每种形状每个旋转最左边一格的列偏移：方块最左边的格子位于第c列时，x = c - shape_min_dx
+shape_min_dx = shape_cells[..., 0].min(axis=2)
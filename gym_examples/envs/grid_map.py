@@ -0,0 +1,212 @@
+from collections import OrderedDict
+import os
+
+import numpy as np
+
+
+# GridWorld的障碍物地图：walls[y, x]为1表示墙，使用uint8数组存储，
+# 大地图可以从.npy文件内存映射加载。到目标的最短路径距离由BFS距离场给出，
+# 每个目标只计算一次，并按最近最少使用的顺序缓存max_cached_fields个。
+# 一次BFS的耗时与空格数成正比（1000x1000的开阔地图约0.15秒），
+# 目标在每次reset时随机选择，所以大地图上缓存很少命中，每次reset大约要付出一次BFS。
+# 空格的连通分量在第一次使用时标记一次，用于在智能体可以到达的格子中采样目标。
+# 前沿小于这个大小时BFS逐个格子扩展
+_small_frontier = 64
+
+
+class GridMap:
+    def __init__(self, walls, max_cached_fields=16):
+        # np.asarray不复制，内存映射的地图在构造时不会被整体读入内存
+        walls = np.asarray(walls)
+        assert (
+            walls.ndim == 2 and walls.shape[0] == walls.shape[1]
+        ), "GridWorld maps must be square"
+        self.walls = walls if walls.dtype == np.uint8 else walls.astype(np.uint8)
+        self.size = walls.shape[0]
+        self.max_cached_fields = max_cached_fields
+        self._fields = OrderedDict()
+
+        self._components = None
+
+    # 从文件加载：.npy文件以只读内存映射方式打开；文本文件中"#"为墙，每行是一个y
+    @classmethod
+    def load(cls, path, mmap=True, **kwargs):
+        if os.path.splitext(path)[1] == ".npy":
+            return cls(np.load(path, mmap_mode="r" if mmap else None), **kwargs)
+        with open(path) as f:
+            return cls.from_text(f.read(), **kwargs)
+
+    @classmethod
+    def from_text(cls, text, **kwargs):
+        rows = [line.rstrip("\n") for line in text.strip("\n").splitlines()]
+        return cls(
+            np.array([[c == "#" for c in row] for row in rows], dtype=np.uint8),
+            **kwargs
+        )
+
+    def is_wall(self, x, y):
+        return self.walls[y, x] != 0
+
+    # 到target的最短路径距离场，形状为(size, size)，按[y, x]索引，不可达为-1
+    def distance_field(self, target):
+        key = (int(target[0]), int(target[1]))
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+
+        field = self._bfs(key)
+        self._fields[key] = field
+        if len(self._fields) > self.max_cached_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    # 连通分量编号，形状为(size, size)，按[y, x]索引，墙为-1
+    @property
+    def components(self):
+        if self._components is None:
+            self._label_components()
+        return self._components
+
+    # (x, y)所在连通分量的格子数，墙为0
+    def component_size(self, x, y):
+        component = self.components[y, x]
+        if component < 0:
+            return 0
+        return int(
+            self._component_starts[component + 1] - self._component_starts[component]
+        )
+
+    # 可以作为起点的格子（展平的y * size + x）：所在的连通分量至少还有另一个空格
+    @property
+    def spawn_cells(self):
+        if self._components is None:
+            self._label_components()
+        return self._spawn_cells
+
+    # 在(x, y)所在的连通分量中均匀采样一个不同于(x, y)的格子，分量只有(x, y)自己时返回None
+    def sample_reachable(self, rng, x, y):
+        component = self.components[y, x]
+        start, end = (
+            self._component_starts[component],
+            self._component_starts[component + 1],
+        )
+        if end - start < 2:
+            return None
+        own = y * self.size + x
+        cell = self._component_cells[start + rng.integers(end - start - 1)]
+        if cell == own:
+            cell = self._component_cells[end - 1]
+        return int(cell % self.size), int(cell // self.size)
+
+    def distance(self, agent, target):
+        return int(self.distance_field(target)[agent[1], agent[0]])
+
+    # 逐层扩展的BFS，直接在展平的墙数组上做边界检查，除结果外不分配整张地图大小的数组。
+    # 前沿很小时（例如蜿蜒的走廊）每层的NumPy调用开销远大于实际工作，改为逐个格子扩展；
+    # 前沿较大时整层向量化扩展。每个格子只入队一次，总耗时与空格数成正比
+    def _bfs(self, target):
+        size = self.size
+        n = size * size
+        walls = self.walls.reshape(-1)
+        dist = np.full(n, -1, dtype=np.int32)
+        start = target[1] * size + target[0]
+        if walls[start]:
+            return dist.reshape(size, size)
+        dist[start] = 0
+        # 逐个格子扩展时通过memoryview读写，取到的是Python整数，比NumPy标量快得多
+        dist_view, walls_view = memoryview(dist), memoryview(walls)
+        frontier = [start]
+        d = 0
+        while len(frontier):
+            if len(frontier) < _small_frontier:
+                if not isinstance(frontier, list):
+                    frontier = frontier.tolist()
+                frontier, d = self._expand_small(frontier, d, dist_view, walls_view)
+            else:
+                d += 1
+                frontier = self._expand(np.asarray(frontier), d, dist, walls)
+        return dist.reshape(size, size)
+
+    # 逐个格子逐层扩展，直到前沿变大或为空，返回新的前沿（列表）和它的距离
+    def _expand_small(self, frontier, d, dist, walls):
+        size = self.size
+        last_row = size * (size - 1)
+        while frontier and len(frontier) < _small_frontier:
+            d += 1
+            new = []
+            for i in frontier:
+                x = i % size
+                if x < size - 1 and dist[i + 1] < 0 and not walls[i + 1]:
+                    dist[i + 1] = d
+                    new.append(i + 1)
+                if x > 0 and dist[i - 1] < 0 and not walls[i - 1]:
+                    dist[i - 1] = d
+                    new.append(i - 1)
+                if i < last_row and dist[i + size] < 0 and not walls[i + size]:
+                    dist[i + size] = d
+                    new.append(i + size)
+                if i >= size and dist[i - size] < 0 and not walls[i - size]:
+                    dist[i - size] = d
+                    new.append(i - size)
+            frontier = new
+        return frontier, d
+
+    # 向量化地扩展一层，返回新的前沿（数组）。重复的邻居先写入互不相同的负数编号，
+    # 只保留编号没有被覆盖的那一个，不需要排序去重
+    def _expand(self, frontier, d, dist, walls):
+        size = self.size
+        x = frontier % size
+        neighbors = np.concatenate(
+            [
+                frontier[x < size - 1] + 1,
+                frontier[x > 0] - 1,
+                frontier[frontier < size * (size - 1)] + size,
+                frontier[frontier >= size] - size,
+            ]
+        )
+        neighbors = neighbors[dist[neighbors] < 0]
+        neighbors = neighbors[walls[neighbors] == 0]
+        marks = -2 - np.arange(len(neighbors), dtype=np.int32)
+        dist[neighbors] = marks
+        neighbors = neighbors[dist[neighbors] == marks]
+        dist[neighbors] = d
+        return neighbors
+
+    # 标记空格的连通分量：相邻空格的根合并到编号较小的一个，再用指针跳跃压缩路径，
+    # 直到所有相邻空格的根相同。每一轮都是整个数组上的运算，轮数大约是对数级的
+    def _label_components(self):
+        size = self.size
+        free = self.walls.reshape(-1) == 0
+        cells = np.flatnonzero(free)
+        right = cells[cells % size < size - 1]
+        right = right[free[right + 1]]
+        down = cells[cells < size * (size - 1)]
+        down = down[free[down + size]]
+        u = np.concatenate([right, down])
+        v = np.concatenate([right + 1, down + size])
+        parent = np.arange(free.size)
+        while True:
+            pu, pv = parent[u], parent[v]
+            linked = pu != pv
+            if not linked.any():
+                break
+            lo = np.minimum(pu[linked], pv[linked])
+            hi = np.maximum(pu[linked], pv[linked])
+            np.minimum.at(parent, hi, lo)
+            while True:
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+
+        # 根编号压缩为0..k-1，并把各分量的格子（展平编号）排在一起
+        _, labels = np.unique(parent[cells], return_inverse=True)
+        components = np.full(free.size, -1, dtype=np.int32)
+        components[cells] = labels
+        self._components = components.reshape(size, size)
+        order = np.argsort(labels, kind="stable")
+        self._component_cells = cells[order]
+        counts = np.bincount(labels)
+        self._component_starts = np.concatenate([[0], np.cumsum(counts)])
+        self._spawn_cells = cells[counts[labels] > 1]
@@ -1,25 +1,75 @@
 import gym
 from gym import spaces
-import pygame
 import numpy as np
+from typing import NamedTuple
+
+from gym_examples.envs.grid_world_model import GridWorldModel
+from gym_examples.envs.grid_world_raster import GridWorldRasterizer
+
+# GridWorldEnv的最小状态，用于clone_state/restore_state
+class GridWorldState(NamedTuple):
+    agent: tuple
+    target: tuple
+    rng_state: dict  # np_random.bit_generator.state
+
 
 # 定义一个GridWorldEnv类，继承自gym.Env
 class GridWorldEnv(gym.Env):
     # 环境的元数据，包括渲染模式和帧率
-    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 4}
+    metadata = {
+        "render_modes": ["human", "rgb_array", "viewer"],
+        "render_backends": ["numpy", "pygame"],
+        "render_fps": 4,
+        "obs_modes": ["dict", "flat", "state_id"],
+        "dynamics": ["simulate", "table"],
+    }
 
     # 初始化环境
-    def __init__(self, render_mode=None, size=5):
+    def __init__(
+        self,
+        render_mode=None,
+        size=5,
+        render_backend="numpy",
+        obs_mode="dict",
+        with_info=True,
+        grid_map=None,
+        reward_shaping=0.0,
+        dynamics="simulate",
+    ):
+        # 可选的障碍物地图（GridMap），提供时方格世界的大小由地图决定，
+        # info中的distance为到目标的真实最短路径长度
+        self.grid_map = grid_map
+        self._walls = None if grid_map is None else grid_map.walls
+        self._distance_field = None
+        # 有地图时，每一步额外奖励reward_shaping * (上一步的距离 - 当前距离)
+        self.reward_shaping = reward_shaping
+        if grid_map is not None:
+            size = grid_map.size
+            assert len(grid_map.spawn_cells), "the map needs at least two connected free cells"
         self.size = size  # 方格世界的大小
         self.window_size = 512  # PyGame窗口的大小
 
-        # 观察空间，包含了智能体和目标的位置
-        self.observation_space = spaces.Dict(
-            {
-                "agent": spaces.Box(0, size - 1, shape=(2,), dtype=int),  # 智能体的位置
-                "target": spaces.Box(0, size - 1, shape=(2,), dtype=int),  # 目标的位置
-            }
-        )
+        # 观察模式：
+        # "dict"：包含智能体和目标位置的字典
+        # "flat"：预先分配的int数组[agent_x, agent_y, target_x, target_y]，每步原地更新
+        # "state_id"：单个整数((agent_x * size + agent_y) * size + target_x) * size + target_y
+        # 后两种模式使用快速的step：原地更新位置，用整数计算曼哈顿距离
+        assert obs_mode in self.metadata["obs_modes"]
+        self.obs_mode = obs_mode
+        self.with_info = with_info  # 为False时info为空字典，不计算距离
+        if obs_mode == "flat":
+            self.observation_space = spaces.Box(0, size - 1, shape=(4,), dtype=int)
+        elif obs_mode == "state_id":
+            self.observation_space = spaces.Discrete(size**4)
+        else:
+            # 观察空间，包含了智能体和目标的位置
+            self.observation_space = spaces.Dict(
+                {
+                    "agent": spaces.Box(0, size - 1, shape=(2,), dtype=int),  # 智能体的位置
+                    "target": spaces.Box(0, size - 1, shape=(2,), dtype=int),  # 目标的位置
+                }
+            )
+        self._flat_obs = np.zeros(4, dtype=int)
 
         # 动作空间，有4个动作，分别对应“右”、“上”、“左”、“下”
         self.action_space = spaces.Discrete(4)
@@ -31,145 +81,329 @@ class GridWorldEnv(gym.Env):
             2: np.array([-1, 0]),  # 左
             3: np.array([0, -1]),  # 下
         }
+        self._direction_table = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+        # 动力学："simulate"每步计算新位置；"table"每步只在编译好的
+        # GridWorldModel转移表中查找下一个位置（只用于快速的观察模式）
+        assert dynamics in self.metadata["dynamics"]
+        assert dynamics == "simulate" or obs_mode != "dict"
+        self.dynamics = dynamics
+        self.model = None
+        self._location_table = None
+        if dynamics == "table":
+            self.model = GridWorldModel.from_env(self)
+            self._location_table = self.model.location_table()
 
         # 确保render_mode是可接受的值
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self.render_mode = render_mode
+        # "viewer"模式与"human"一样在每一步后渲染，但只把位置发布给独立的显示进程，不等待显示
+        self._auto_render = render_mode in ("human", "viewer")
+        self.viewer = None
 
         # 如果使用人类渲染模式，self.window和self.clock将用于确保正确的帧率
         self.window = None
         self.clock = None
 
+        # rgb_array模式的渲染后端："numpy"不依赖pygame，画面与"pygame"相同
+        assert render_backend in self.metadata["render_backends"]
+        self.render_backend = render_backend
+        self.rasterizer = None
+
     # 获取当前的观察
     def _get_obs(self):
+        if self.obs_mode == "flat":
+            return self._flat_obs
+        if self.obs_mode == "state_id":
+            return self._state_id()
         return {"agent": self._agent_location, "target": self._target_location}
 
     # 获取当前的信息
     def _get_info(self):
+        if not self.with_info:
+            return {}
+        if self._walls is not None:
+            return {"distance": int(self._distance_field[self._ay, self._ax])}
+        if self.obs_mode != "dict":
+            return {"distance": abs(self._ax - self._tx) + abs(self._ay - self._ty)}
         return {
             "distance": np.linalg.norm(
                 self._agent_location - self._target_location, ord=1
             )  # 计算曼哈顿距离
         }
 
+    # 取出（或计算）到当前目标的距离场
+    def _update_distance_field(self):
+        self._distance_field = self.grid_map.distance_field(self._target_location)
+
+    # 有地图时的重置：智能体只在至少还有另一个空格与之连通的格子中出生，
+    # 目标在智能体所在的连通分量中采样，所以总是可以到达，只需计算一次距离场
+    def _reset_on_map(self):
+        spawn_cells = self.grid_map.spawn_cells
+        cell = spawn_cells[self.np_random.integers(len(spawn_cells))]
+        ax, ay = int(cell % self.size), int(cell // self.size)
+        self._agent_location = np.array([ax, ay], dtype=int)
+        self._target_location = np.array(
+            self.grid_map.sample_reachable(self.np_random, ax, ay), dtype=int
+        )
+        self._update_distance_field()
+
+    # (智能体, 目标)位置对应的整数编号
+    def _state_id(self):
+        size = self.size
+        return ((self._ax * size + self._ay) * size + self._tx) * size + self._ty
+
+    # 把数组形式的位置同步到快速模式使用的整数和观测缓冲区
+    def _sync_locations(self):
+        self._ax, self._ay = self._agent_location.tolist()
+        self._tx, self._ty = self._target_location.tolist()
+        self._flat_obs[:2] = self._agent_location
+        self._flat_obs[2:] = self._target_location
+
     # 重置环境
     def reset(self, seed=None, options=None):
         # 需要这行代码来设置随机种子
         super().reset(seed=seed)
 
-        # 随机选择智能体的位置
-        self._agent_location = self.np_random.integers(0, self.size, size=2, dtype=int)
+        if self._walls is not None:
+            self._reset_on_map()
+        else:
+            # 随机选择智能体的位置
+            self._agent_location = self.np_random.integers(0, self.size, size=2, dtype=int)
 
-        # 随机选择目标的位置，直到它与智能体的位置不同
-        self._target_location = self._agent_location
-        while np.array_equal(self._target_location, self._agent_location):
-            self._target_location = self.np_random.integers(
-                0, self.size, size=2, dtype=int
-            )
+            # 随机选择目标的位置，直到它与智能体的位置不同
+            self._target_location = self._agent_location
+            while np.array_equal(self._target_location, self._agent_location):
+                self._target_location = self.np_random.integers(
+                    0, self.size, size=2, dtype=int
+                )
+        self._sync_locations()
 
         observation = self._get_obs()
         info = self._get_info()
 
         # 如果渲染模式是“human”，则渲染当前帧
-        if self.render_mode == "human":
+        if self._auto_render:
             self._render_frame()
 
         return observation, info
 
     # 执行动作
     def step(self, action):
+        if self.obs_mode != "dict":
+            return self._step_fast(action)
+
         # 将动作映射到方向
         direction = self._action_to_direction[action]
         # 使用np.clip确保智能体不会离开网格
-        self._agent_location = np.clip(
-            self._agent_location + direction, 0, self.size - 1
-        )
+        location = np.clip(self._agent_location + direction, 0, self.size - 1)
+        # 撞墙时留在原地
+        if self._walls is None or not self._walls[location[1], location[0]]:
+            self._agent_location = location
         # 当且仅当智能体到达目标时，episode结束
         terminated = np.array_equal(self._agent_location, self._target_location)
         reward = 1 if terminated else 0  # 二进制稀疏奖励
+        if self._walls is not None:
+            x, y = self._agent_location.tolist()
+            reward += self._shaping_reward(x, y)
+            self._ax, self._ay = x, y
         observation = self._get_obs()
         info = self._get_info()
 
         # 如果渲染模式是“human”，则渲染当前帧
-        if self.render_mode == "human":
+        if self._auto_render:
+            self._render_frame()
+
+        return observation, reward, terminated, False, info
+
+    # 按距离场计算的塑形奖励：从(self._ax, self._ay)移动到(x, y)时距离的减少量
+    def _shaping_reward(self, x, y):
+        if not self.reward_shaping:
+            return 0
+        field = self._distance_field
+        return self.reward_shaping * int(field[self._ay, self._ax] - field[y, x])
+
+    # 快速的step：用Python整数计算新位置，原地写入位置数组和观测缓冲区
+    def _step_fast(self, action):
+        if self._location_table is not None:
+            # 转移表里已经处理了边界和墙
+            x, y = self._location_table[self._ax * self.size + self._ay][action]
+        else:
+            dx, dy = self._direction_table[action]
+            top = self.size - 1
+            x = self._ax + dx
+            x = 0 if x < 0 else top if x > top else x
+            y = self._ay + dy
+            y = 0 if y < 0 else top if y > top else y
+            # 撞墙时留在原地
+            if self._walls is not None and self._walls[y, x]:
+                x, y = self._ax, self._ay
+        shaping = 0 if self._walls is None else self._shaping_reward(x, y)
+        self._ax = x
+        self._ay = y
+        location = self._agent_location
+        location[0] = x
+        location[1] = y
+        # 当且仅当智能体到达目标时，episode结束
+        terminated = x == self._tx and y == self._ty
+        reward = (1 if terminated else 0) + shaping  # 二进制稀疏奖励
+
+        if self.obs_mode == "flat":
+            observation = self._flat_obs
+            observation[0] = x
+            observation[1] = y
+        else:
+            observation = ((x * self.size + y) * self.size + self._tx) * self.size + self._ty
+        if not self.with_info:
+            info = {}
+        elif self._walls is not None:
+            info = {"distance": int(self._distance_field[y, x])}
+        else:
+            info = {"distance": abs(x - self._tx) + abs(y - self._ty)}
+
+        # 如果渲染模式是“human”，则渲染当前帧
+        if self._auto_render:
             self._render_frame()
 
         return observation, reward, terminated, False, info
 
-# 添加渲染方法到GridWorldEnv类中
-def render(self):
-    # 如果渲染模式是"rgb_array"，则返回当前帧的渲染
-    if self.render_mode == "rgb_array":
-        return self._render_frame()
-
-# 私有方法，用于渲染当前帧
-def _render_frame(self):
-    # 如果渲染模式是"human"且窗口尚未初始化，则初始化PyGame窗口
-    if self.window is None and self.render_mode == "human":
-        pygame.init()
-        pygame.display.init()
-        self.window = pygame.display.set_mode((self.window_size, self.window_size))
-    # 如果渲染模式是"human"且时钟尚未初始化，则初始化时钟
-    if self.clock is None and self.render_mode == "human":
-        self.clock = pygame.time.Clock()
-
-    # 创建一个画布，填充为白色
-    canvas = pygame.Surface((self.window_size, self.window_size))
-    canvas.fill((255, 255, 255))
-    pix_square_size = (
-            self.window_size / self.size
-    )  # 单个网格方块的像素大小
-
-    # 首先绘制目标
-    pygame.draw.rect(
-        canvas,
-        (255, 0, 0),  # 红色
-        pygame.Rect(
-            pix_square_size * self._target_location,
-            (pix_square_size, pix_square_size),
-            ),
-    )
-    # 然后绘制智能体
-    pygame.draw.circle(
-        canvas,
-        (0, 0, 255),  # 蓝色
-        (self._agent_location + 0.5) * pix_square_size,
-        pix_square_size / 3,
+    # 保存当前状态的快照，供搜索和规划算法分支使用
+    def clone_state(self):
+        return GridWorldState(
+            agent=tuple(self._agent_location.tolist()),
+            target=tuple(self._target_location.tolist()),
+            rng_state=self.np_random.bit_generator.state,
         )
 
-    # 最后，添加网格线
-    for x in range(self.size + 1):
-        pygame.draw.line(
+    # 恢复clone_state保存的快照
+    def restore_state(self, state):
+        self._agent_location = np.array(state.agent, dtype=int)
+        self._target_location = np.array(state.target, dtype=int)
+        self.np_random.bit_generator.state = state.rng_state
+        self._sync_locations()
+        if self._walls is not None:
+            self._update_distance_field()
+
+    # 渲染方法
+    def render(self):
+        # 如果渲染模式是"rgb_array"，则返回当前帧的渲染
+        if self.render_mode == "rgb_array":
+            return self._render_frame()
+
+    # 私有方法，用于渲染当前帧
+    def _render_frame(self):
+        if self.render_mode == "viewer":
+            if self.viewer is None:
+                from gym_examples.envs.shared_viewer import SharedMemoryViewer, GridWorldDrawer
+
+                self.viewer = SharedMemoryViewer(
+                    4,
+                    np.int64,
+                    GridWorldDrawer(self.size, self.window_size, self._walls),
+                    fps=self.metadata["render_fps"],
+                    caption="GridWorld",
+                )
+            self.viewer.publish(
+                (self._agent_location[0], self._agent_location[1],
+                 self._target_location[0], self._target_location[1])
+            )
+            return
+
+        if self.render_mode == "rgb_array" and self.render_backend == "numpy":
+            if self.rasterizer is None:
+                self.rasterizer = GridWorldRasterizer(
+                    self.size, self.window_size, walls=self._walls
+                )
+            return self.rasterizer.draw(
+                self._agent_location, self._target_location
+            ).copy()
+
+        # pygame只在human模式或pygame后端时才导入
+        import pygame
+
+        # 如果渲染模式是"human"且窗口尚未初始化，则初始化PyGame窗口
+        if self.window is None and self.render_mode == "human":
+            pygame.init()
+            pygame.display.init()
+            self.window = pygame.display.set_mode((self.window_size, self.window_size))
+        # 如果渲染模式是"human"且时钟尚未初始化，则初始化时钟
+        if self.clock is None and self.render_mode == "human":
+            self.clock = pygame.time.Clock()
+
+        # 创建一个画布，填充为白色
+        canvas = pygame.Surface((self.window_size, self.window_size))
+        canvas.fill((255, 255, 255))
+        pix_square_size = (
+                self.window_size / self.size
+        )  # 单个网格方块的像素大小
+
+        # 障碍物地图中的墙
+        if self._walls is not None:
+            for y, x in np.argwhere(self._walls):
+                pygame.draw.rect(
+                    canvas,
+                    (128, 128, 128),  # 灰色
+                    pygame.Rect(
+                        pix_square_size * np.array([x, y]),
+                        (pix_square_size, pix_square_size),
+                    ),
+                )
+
+        # 首先绘制目标
+        pygame.draw.rect(
             canvas,
-            0,  # 黑色
-            (0, pix_square_size * x),
-            (self.window_size, pix_square_size * x),
-            width=3,
+            (255, 0, 0),  # 红色
+            pygame.Rect(
+                pix_square_size * self._target_location,
+                (pix_square_size, pix_square_size),
+                ),
         )
-        pygame.draw.line(
+        # 然后绘制智能体
+        pygame.draw.circle(
             canvas,
-            0,  # 黑色
-            (pix_square_size * x, 0),
-            (pix_square_size * x, self.window_size),
-            width=3,
-        )
+            (0, 0, 255),  # 蓝色
+            (self._agent_location + 0.5) * pix_square_size,
+            pix_square_size / 3,
+            )
 
-    if self.render_mode == "human":
-        # 将画布上的内容复制到可见窗口
-        self.window.blit(canvas, canvas.get_rect())
-        pygame.event.pump()
-        pygame.display.update()
-
-        # 确保人类渲染按照预定义的帧率进行
-        self.clock.tick(self.metadata["render_fps"])
-    else:  # rgb_array模式
-        return np.transpose(
-            np.array(pygame.surfarray.pixels3d(canvas)), axes=(1, 0, 2)
-        )
+        # 最后，添加网格线
+        for x in range(self.size + 1):
+            pygame.draw.line(
+                canvas,
+                0,  # 黑色
+                (0, pix_square_size * x),
+                (self.window_size, pix_square_size * x),
+                width=3,
+            )
+            pygame.draw.line(
+                canvas,
+                0,  # 黑色
+                (pix_square_size * x, 0),
+                (pix_square_size * x, self.window_size),
+                width=3,
+            )
+
+        if self.render_mode == "human":
+            # 将画布上的内容复制到可见窗口
+            self.window.blit(canvas, canvas.get_rect())
+            pygame.event.pump()
+            pygame.display.update()
+
+            # 确保人类渲染按照预定义的帧率进行
+            self.clock.tick(self.metadata["render_fps"])
+        else:  # rgb_array模式
+            return np.transpose(
+                np.array(pygame.surfarray.pixels3d(canvas)), axes=(1, 0, 2)
+            )
+
+    # 关闭方法
+    def close(self):
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+        # 如果窗口不为空，则退出PyGame显示并关闭PyGame
+        if self.window is not None:
+            import pygame
 
-# 添加关闭方法到GridWorldEnv类中
-def close(self):
-    # 如果窗口不为空，则退出PyGame显示并关闭PyGame
-    if self.window is not None:
-        pygame.display.quit()
-        pygame.quit()
\ No newline at end of file
+            pygame.display.quit()
+            pygame.quit()
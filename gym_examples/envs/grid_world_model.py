@@ -0,0 +1,145 @@
+import numpy as np
+
+
+# GridWorldEnv动力学的表格模型。状态编号与GridWorldEnv的state_id观测相同：
+# state = agent_cell * n_cells + target_cell，其中cell = x * size + y。
+# 目标在episode中不动，所以转移只需要一张(n_cells, n_actions)的智能体转移表，
+# 完整的(n_states, n_actions)转移表和奖励表由它按需展开。
+# 奖励是GridWorldEnv的二进制稀疏奖励：进入目标格子时为1，之后episode结束。
+class GridWorldModel:
+    def __init__(self, size, action_to_direction, walls=None):
+        self.size = size
+        self.n_cells = size * size
+        self.n_states = self.n_cells * self.n_cells
+        self.n_actions = len(action_to_direction)
+        directions = np.array([action_to_direction[a] for a in range(self.n_actions)])
+
+        # 每个格子在每个动作下的下一个格子：与step相同，先clip到网格内，撞墙时留在原地
+        xs, ys = np.divmod(np.arange(self.n_cells), size)
+        nx = np.clip(xs[:, None] + directions[:, 0], 0, size - 1)
+        ny = np.clip(ys[:, None] + directions[:, 1], 0, size - 1)
+        if walls is not None:
+            blocked = walls[ny, nx] != 0
+            nx = np.where(blocked, xs[:, None], nx)
+            ny = np.where(blocked, ys[:, None], ny)
+        self.next_cell = (nx * size + ny).astype(np.int32)
+        self.walls = walls
+
+    @classmethod
+    def from_env(cls, env):
+        env = env.unwrapped
+        return cls(env.size, env._action_to_direction, env._walls)
+
+    def cell(self, x, y):
+        return x * self.size + y
+
+    def split_state(self, state):
+        return np.divmod(state, self.n_cells)
+
+    # 稀疏表上的单步转移，state和action可以是数组
+    def step(self, state, action):
+        agent, target = self.split_state(state)
+        next_agent = self.next_cell[agent, action]
+        terminated = next_agent == target
+        return (
+            next_agent * self.n_cells + target,
+            terminated.astype(np.float32),
+            terminated,
+        )
+
+    # 展开完整的转移表和奖励表，形状为(n_states, n_actions)。
+    # 表的大小是size**4 * n_actions，只适合较小的方格世界
+    def tables(self):
+        next_state = (
+            self.next_cell[:, None, :].astype(np.int64) * self.n_cells
+            + np.arange(self.n_cells)[None, :, None]
+        ).reshape(self.n_states, self.n_actions)
+        reward = (next_state // self.n_cells == next_state % self.n_cells).astype(
+            np.float32
+        )
+        terminal = (
+            np.arange(self.n_states) // self.n_cells
+            == np.arange(self.n_states) % self.n_cells
+        )
+        return next_state, reward, terminal
+
+    # 每个(格子, 动作)对应的下一个位置(x, y)，供GridWorldEnv的查表step使用
+    def location_table(self):
+        nx, ny = np.divmod(self.next_cell, self.size)
+        return [
+            list(zip(row_x, row_y)) for row_x, row_y in zip(nx.tolist(), ny.tolist())
+        ]
+
+    # 对一组目标同时做价值迭代，返回形状为(len(targets), n_cells)的最优价值和贪心策略。
+    # 确定性的最短路径问题从0开始迭代，最多n_cells次就会精确收敛。
+    # 迭代时价值按(n_cells, batch)存放，按行收集后继格子的价值；
+    # 目标格子的价值存为1 / gamma，这样进入目标的动作价值gamma * v正好是奖励1
+    def value_iteration(
+        self, targets, gamma=0.99, tol=0.0, max_iter=None, batch_size=64
+    ):
+        assert 0 < gamma <= 1
+        targets = np.asarray(targets, dtype=np.int64).reshape(-1)
+        values = np.empty((len(targets), self.n_cells))
+        policy = np.empty((len(targets), self.n_cells), dtype=np.int64)
+        max_iter = self.n_cells + 1 if max_iter is None else max_iter
+        next_cells = [
+            np.ascontiguousarray(self.next_cell[:, a]) for a in range(self.n_actions)
+        ]
+        for start in range(0, len(targets), batch_size):
+            batch = targets[start : start + batch_size]
+            cols = np.arange(len(batch))
+            v = np.zeros((self.n_cells, len(batch)))
+            v[batch, cols] = 1 / gamma
+            new_v = np.empty_like(v)
+            for _ in range(max_iter):
+                np.take(v, next_cells[0], axis=0, out=new_v)
+                for next_cell in next_cells[1:]:
+                    np.maximum(new_v, v[next_cell], out=new_v)
+                new_v *= gamma
+                new_v[batch, cols] = 1 / gamma
+                converged = np.abs(new_v - v).max() <= tol
+                v, new_v = new_v, v
+                if converged:
+                    break
+            q = np.stack([v[next_cell] for next_cell in next_cells], axis=1)
+            policy[start : start + batch_size] = q.argmax(axis=1).T
+            v[batch, cols] = 0.0  # 目标格子是终止状态
+            values[start : start + batch_size] = v.T
+        return values, policy
+
+    # 评估确定性策略。policy的形状为(len(targets), n_cells)，或(n_cells,)表示所有目标共用，
+    # 或(n_states,)表示按state_id给出的完整策略
+    def evaluate_policy(self, policy, targets, gamma=0.99, tol=0.0, max_iter=None):
+        assert 0 < gamma <= 1
+        targets = np.asarray(targets, dtype=np.int64).reshape(-1)
+        policy = np.asarray(policy, dtype=np.int64)
+        if policy.ndim == 1 and len(policy) == self.n_states:
+            policy = policy.reshape(self.n_cells, self.n_cells)[:, targets].T
+        policy = np.broadcast_to(policy, (len(targets), self.n_cells))
+        cols = np.arange(len(targets))
+        # 按策略选出的后继格子在(n_cells, batch)价值数组中的展平下标
+        next_index = (
+            np.take_along_axis(self.next_cell, policy.T, axis=1).astype(np.int64)
+            * len(targets)
+            + cols
+        )
+        v = np.zeros((self.n_cells, len(targets)))
+        v[targets, cols] = 1 / gamma
+        max_iter = self.n_cells + 1 if max_iter is None else max_iter
+        for _ in range(max_iter):
+            new_v = gamma * v.ravel()[next_index]
+            new_v[targets, cols] = 1 / gamma
+            converged = np.abs(new_v - v).max() <= tol
+            v = new_v
+            if converged:
+                break
+        v[targets, cols] = 0.0
+        return v.T.copy()
+
+    # 一组state_id在最优策略下的价值，例如评估时每个episode初始状态的最优基线。
+    # 只对出现过的目标求解
+    def optimal_values(self, states, gamma=0.99, **kwargs):
+        agents, targets = self.split_state(np.asarray(states, dtype=np.int64))
+        unique_targets, index = np.unique(targets, return_inverse=True)
+        values, _ = self.value_iteration(unique_targets, gamma=gamma, **kwargs)
+        return values[index.reshape(agents.shape), agents]
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+# 与pygame.draw.circle相同的中点画圆算法，返回以圆心为原点的(2r, 2r)掩码，
+# 掩码的第(i, j)个元素对应相对圆心的偏移(i - r, j - r)
+def _disc_mask(radius):
+    mask = np.zeros((2 * radius, 2 * radius), dtype=bool)
+    f = 1 - radius
+    ddf_x = 0
+    ddf_y = -2 * radius
+    x = 0
+    y = radius
+    while x < y:
+        if f >= 0:
+            y -= 1
+            ddf_y += 2
+            f += ddf_y
+        x += 1
+        ddf_x += 2
+        f += ddf_x + 1
+        if f >= 0:
+            mask[radius + y - 1, radius - x : radius + x] = True
+            mask[radius - y, radius - x : radius + x] = True
+        mask[radius + x - 1, radius - y : radius + y] = True
+        mask[radius - x, radius - y : radius + y] = True
+    return mask
+
+
+# 不依赖pygame的GridWorld渲染器，画面与GridWorldEnv的pygame渲染逐像素相同。
+# 背景和网格线对每个size只计算一次，之后每帧只把目标和智能体写进复用的缓冲区。
+class GridWorldRasterizer:
+    def __init__(self, size, window_size=512, walls=None):
+        self.size = size
+        self.window_size = window_size
+        pix_square_size = window_size / size  # 单个网格方块的像素大小
+        self.cell = int(pix_square_size)  # 目标方块的边长
+        self.offsets = (pix_square_size * np.arange(size)).astype(int)  # 每个格子左上角的像素坐标
+        self.centers = ((np.arange(size) + 0.5) * pix_square_size).astype(
+            int
+        )  # 每个格子的圆心坐标
+        self.radius = int(pix_square_size / 3)
+        self.disc = _disc_mask(self.radius)
+
+        # 网格线：宽度为3，与pygame.draw.line相同
+        self.line_mask = np.zeros(window_size, dtype=bool)
+        for x in range(size + 1):
+            p = int(pix_square_size * x)
+            self.line_mask[max(p - 1, 0) : p + 2] = True
+        self.line_mask_2d = self.line_mask[:, None] | self.line_mask[None, :]
+
+        self.background = np.full((window_size, window_size, 3), 255, dtype=np.uint8)
+        # 障碍物地图中的墙（walls[y, x]非0）画成灰色方块
+        if walls is not None:
+            pixels = np.arange(window_size)
+            cells = np.searchsorted(self.offsets, pixels, side="right") - 1
+            inside = pixels < self.offsets[cells] + self.cell
+            wall_mask = np.asarray(walls)[cells[:, None], cells[None, :]] != 0
+            wall_mask &= inside[:, None] & inside[None, :]
+            self.background[wall_mask] = (128, 128, 128)
+        self.background[self.line_mask_2d] = 0
+
+        self.frame = self.background.copy()
+        self._dirty = []  # 上一帧画过精灵的区域
+
+    def _boxes(self, agent, target):
+        ty, tx = self.offsets[target[1]], self.offsets[target[0]]
+        cy, cx = self.centers[agent[1]], self.centers[agent[0]]
+        r = self.radius
+        return (ty, tx, ty + self.cell, tx + self.cell), (
+            cy - r,
+            cx - r,
+            cy + r,
+            cx + r,
+        )
+
+    # 渲染一帧，返回(window_size, window_size, 3)的RGB数组。
+    # 不传out时写入内部缓冲区，只恢复上一帧画过的区域；下一次调用会覆盖它。
+    def draw(self, agent, target, out=None):
+        frame = self.frame if out is None else out
+        if out is None:
+            for y0, x0, y1, x1 in self._dirty:
+                frame[y0:y1, x0:x1] = self.background[y0:y1, x0:x1]
+        else:
+            np.copyto(frame, self.background)
+
+        target_box, agent_box = self._boxes(agent, target)
+        w = self.window_size
+        y0, x0, y1, x1 = target_box
+        frame[y0:y1, x0:x1] = (255, 0, 0)  # 红色
+        y0, x0, y1, x1 = agent_box
+        my0, mx0 = max(y0, 0), max(x0, 0)
+        patch = self.disc[my0 - y0 : min(y1, w) - y0, mx0 - x0 : min(x1, w) - x0]
+        frame[my0 : min(y1, w), mx0 : min(x1, w)][patch] = (0, 0, 255)  # 蓝色
+
+        # 网格线画在最上面
+        self._dirty = []
+        for y0, x0, y1, x1 in (target_box, agent_box):
+            y0, x0, y1, x1 = max(y0, 0), max(x0, 0), min(y1, w), min(x1, w)
+            frame[y0:y1, x0:x1][self.line_mask_2d[y0:y1, x0:x1]] = 0
+            self._dirty.append((y0, x0, y1, x1))
+        return frame
+
+    # 批量渲染N个环境，agents和targets的形状为(N, 2)，返回(N, H, W, 3)
+    def draw_batch(self, agents, targets, out=None):
+        n = len(agents)
+        w = self.window_size
+        if out is None:
+            out = np.empty((n, w, w, 3), dtype=np.uint8)
+        out[:] = self.background
+        pixels = np.arange(w)
+
+        # 目标方块
+        ty = self.offsets[targets[:, 1]][:, None]
+        tx = self.offsets[targets[:, 0]][:, None]
+        rows = (pixels >= ty) & (pixels < ty + self.cell)
+        cols = (pixels >= tx) & (pixels < tx + self.cell)
+        out[rows[:, :, None] & cols[:, None, :]] = (255, 0, 0)
+
+        # 智能体圆形
+        r = self.radius
+        dy = pixels - self.centers[agents[:, 1]][:, None] + r
+        dx = pixels - self.centers[agents[:, 0]][:, None] + r
+        valid_y = (dy >= 0) & (dy < 2 * r)
+        valid_x = (dx >= 0) & (dx < 2 * r)
+        disc = (
+            self.disc[
+                np.clip(dy, 0, max(2 * r - 1, 0))[:, :, None],
+                np.clip(dx, 0, max(2 * r - 1, 0))[:, None, :],
+            ]
+            if r > 0
+            else False
+        )
+        out[valid_y[:, :, None] & valid_x[:, None, :] & disc] = (0, 0, 255)
+
+        out[:, self.line_mask_2d] = 0
+        return out
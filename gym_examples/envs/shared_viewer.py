@@ -0,0 +1,132 @@
+import ctypes
+import multiprocessing
+
+import numpy as np
+
+
+# 在独立进程中显示环境画面的查看器。环境每一步把最新的状态（很小的数组）写入共享内存，
+# 不加锁、不等待；显示进程按自己的帧率读取最新状态并绘制，中间来不及显示的状态直接丢弃。
+# 读写用序号做版本检查：写入前后各加1，读到奇数或读前后序号不同说明正在写入，本帧跳过。
+class SharedMemoryViewer:
+    def __init__(
+        self, size, dtype, drawer, fps=30, caption="gym_examples", context=None
+    ):
+        ctx = multiprocessing.get_context(context)
+        self.dtype = np.dtype(dtype)
+        self._buffer = ctx.RawArray(ctypes.c_uint8, size * self.dtype.itemsize)
+        self.state = np.frombuffer(self._buffer, dtype=self.dtype)
+        self._sequence = ctx.RawValue(ctypes.c_uint64, 0)
+        self._running = ctx.RawValue(ctypes.c_bool, True)
+        self._frames_drawn = ctx.RawValue(ctypes.c_uint64, 0)
+        self.published = 0
+        self.process = ctx.Process(
+            target=_display,
+            args=(
+                self._buffer,
+                self.dtype.str,
+                self._sequence,
+                self._running,
+                self._frames_drawn,
+                drawer,
+                fps,
+                caption,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+
+    # 发布最新的状态，只做一次复制，从不阻塞
+    def publish(self, values):
+        sequence = self._sequence
+        sequence.value += 1
+        self.state[:] = values
+        sequence.value += 1
+        self.published += 1
+
+    # 显示进程实际画出的帧数；published - frames_drawn近似等于被丢弃的状态数
+    @property
+    def frames_drawn(self):
+        return self._frames_drawn.value
+
+    @property
+    def is_open(self):
+        return self.process is not None and self.process.is_alive()
+
+    def close(self, timeout=1.0):
+        if self.process is not None:
+            self._running.value = False
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+
+
+# 显示进程：打开窗口，按fps读取最新状态并调用drawer绘制；关闭窗口时退出
+def _display(buffer, dtype, sequence, running, frames_drawn, drawer, fps, caption):
+    import pygame
+
+    pygame.init()
+    window = pygame.display.set_mode(drawer.window_size)
+    pygame.display.set_caption(caption)
+    draw = drawer(window)
+    shared = np.frombuffer(buffer, dtype=np.dtype(dtype))
+    state = np.empty_like(shared)
+    clock = pygame.time.Clock()
+    last = 0
+    while running.value:
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+        before = sequence.value
+        if before != last and before % 2 == 0:
+            np.copyto(state, shared)
+            if sequence.value == before:
+                last = before
+                draw(state)
+                pygame.display.flip()
+                frames_drawn.value += 1
+        clock.tick(fps)
+    pygame.quit()
+
+
+# GridWorld的绘制器，状态为[agent_x, agent_y, target_x, target_y]
+class GridWorldDrawer:
+    def __init__(self, size, window_size=512, walls=None):
+        self.size = size
+        self.window_size = (window_size, window_size)
+        self.walls = walls
+
+    def __call__(self, window):
+        import pygame
+        from gym_examples.envs.grid_world_raster import GridWorldRasterizer
+
+        rasterizer = GridWorldRasterizer(
+            self.size, self.window_size[0], walls=self.walls
+        )
+
+        def draw(state):
+            frame = rasterizer.draw(state[:2], state[2:])
+            pygame.surfarray.blit_array(window, frame.swapaxes(0, 1))
+
+        return draw
+
+
+# Tetris的绘制器，状态为展平的20x10格子（含当前方块）加上得分
+class TetrisDrawer:
+    def __init__(self):
+        from gym_examples.envs.tetris import screen_width, screen_height
+
+        self.window_size = (screen_width, screen_height)
+
+    def __call__(self, window):
+        from gym_examples.envs.bitboard import board_width, board_height
+        from gym_examples.envs.tetris_renderer import TetrisRenderer
+
+        renderer = TetrisRenderer(window)
+        cells = board_width * board_height
+
+        def draw(state):
+            renderer.draw(
+                state[:cells].reshape(board_height, board_width), int(state[cells])
+            )
+
+        return draw
@@ -0,0 +1,49 @@
+import time
+
+
+# 按阶段统计累计耗时和调用次数，另外记录游戏计数（消除的行数、放置的方块数等）。
+# 只有开启统计时环境才会用timed包装各阶段的函数，关闭时没有任何额外开销。
+# 嵌套的阶段（例如gravity中调用的valid_space）会同时计入两者的耗时。
+class StepStats:
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+
+    def reset(self):
+        for name in self.times:
+            self.times[name] = 0.0
+            self.calls[name] = 0
+        for name in self.counters:
+            self.counters[name] = 0
+
+    # 返回包装后的fn，每次调用都记录耗时；指定counter时把返回值累加到该计数上
+    def timed(self, name, fn, counter=None):
+        self.times.setdefault(name, 0.0)
+        self.calls.setdefault(name, 0)
+        if counter is not None:
+            self.counters.setdefault(counter, 0)
+        times, calls, counters = self.times, self.calls, self.counters
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                times[name] += perf_counter() - start
+                calls[name] += 1
+            if counter is not None:
+                counters[counter] += result
+            return result
+
+        return wrapper
+
+    # 扁平的字典，例如{"gravity_time": 0.01, "gravity_calls": 100, "lines_cleared": 3}
+    def as_dict(self):
+        stats = {}
+        for name in self.times:
+            stats[f"{name}_time"] = self.times[name]
+            stats[f"{name}_calls"] = self.calls[name]
+        stats.update(self.counters)
+        return stats
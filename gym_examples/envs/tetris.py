@@ -1,9 +1,5 @@
-import pygame
 import random
 
-# 初始化Pygame
-pygame.init()
-
 # 屏幕大小
 screen_width = 300
 screen_height = 600
@@ -126,7 +122,8 @@ class Piece:
         self.x = x
         self.y = y
         self.shape = shape
-        self.color = shape_colors[shapes.index(shape)]
+        self.shape_id = shapes.index(shape)
+        self.color = shape_colors[self.shape_id]
         self.rotation = 0
 
 # 创建网格
@@ -175,12 +172,16 @@ def check_lost(positions):
             return True
     return False
 
-# 获取随机形状
-def get_shape():
-    return Piece(5, 0, random.choice(shapes))
+# 获取随机形状，传入np_random时使用环境自己的随机数生成器
+def get_shape(np_random=None):
+    if np_random is None:
+        return Piece(5, 0, random.choice(shapes))
+    return Piece(5, 0, shapes[np_random.integers(len(shapes))])
 
 # 绘制文本
 def draw_text_middle(text, size, color, surface):
+    import pygame
+
     font = pygame.font.Font(pygame.font.get_default_font(), size, bold=True)
     label = font.render(text, 1, color)
 
@@ -188,6 +189,8 @@ def draw_text_middle(text, size, color, surface):
 
 # 绘制网格
 def draw_grid(surface, grid):
+    import pygame
+
     sx = top_left_x
     sy = top_left_y
 
@@ -221,6 +224,8 @@ def clear_rows(grid, locked):
 
 # 绘制窗口
 def draw_window(surface, grid, score=0):
+    import pygame
+
     surface.fill((0, 0, 0))
 
     pygame.font.init()
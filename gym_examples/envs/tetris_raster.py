@@ -0,0 +1,59 @@
+import numpy as np
+
+from gym_examples.envs.bitboard import board_width, board_height, cell_colors
+
+# 形状编号到颜色的查找表，灰度按ITU-R BT.601的亮度公式换算
+palette_rgb = np.array(cell_colors, dtype=np.uint8)
+palette_gray = np.round(palette_rgb @ np.array([0.299, 0.587, 0.114])).astype(np.uint8)
+
+
+# 不依赖pygame的Tetris像素观测：把20x10的形状编号平面按查找表上色后放大，
+# 每个格子是cell_size x cell_size的方块；downsample=k时每k个像素取一个。
+# 只画游戏区（没有标题、得分和网格线），直接写入复用的缓冲区。
+class TetrisRasterizer:
+    def __init__(self, cell_size=4, grayscale=False, downsample=1):
+        assert cell_size >= 1 and downsample >= 1
+        self.cell_size = cell_size
+        self.grayscale = grayscale
+        self.downsample = downsample
+        self.palette = palette_gray if grayscale else palette_rgb
+        height = board_height * cell_size // downsample
+        width = board_width * cell_size // downsample
+        self.shape = (height, width) if grayscale else (height, width, 3)
+
+        # 每个格子正好对应整数个输出像素时直接按块广播赋值，否则按像素查找所属的格子
+        self.block = cell_size // downsample if cell_size % downsample == 0 else None
+        self.rows = np.arange(height) * downsample // cell_size
+        self.cols = np.arange(width) * downsample // cell_size
+        self.frame = np.zeros(self.shape, dtype=np.uint8)
+        self._index = None  # 每个像素对应的形状编号，按批大小复用
+
+    # 渲染一个棋盘（20x10的形状编号，0为空格）。不传out时写入内部缓冲区，下一次调用会覆盖它
+    def draw(self, cells, out=None):
+        out = self.frame if out is None else out
+        return self.draw_batch(cells[None], out[None])[0]
+
+    # 批量渲染N个棋盘，boards的形状为(N, 20, 10)，返回(N,) + shape。
+    # 灰度图直接放大查表后的格子；RGB图先把形状编号放大成每个像素的编号（uint8），
+    # 再一次查表上色，比逐通道广播赋值快
+    def draw_batch(self, boards, out=None):
+        n = len(boards)
+        if out is None:
+            out = np.empty((n,) + self.shape, dtype=np.uint8)
+        if self.grayscale:
+            self._upscale(self.palette[boards], out)
+            return out
+        if self._index is None or len(self._index) != n:
+            self._index = np.empty((n,) + self.shape[:2], dtype=np.uint8)
+        self._upscale(boards, self._index)
+        return np.take(self.palette, self._index, axis=0, out=out)
+
+    # 把(N, 20, 10)的数组放大写入(N, height, width)的out
+    def _upscale(self, cells, out):
+        if self.block is not None:
+            b = self.block
+            out.reshape(len(out), board_height, b, board_width, b)[...] = cells[
+                :, :, None, :, None
+            ]
+        else:
+            out[...] = cells[:, self.rows[:, None], self.cols[None, :]]
@@ -0,0 +1,132 @@
+import numpy as np
+import pygame
+
+from gym_examples.envs.bitboard import board_width, board_height, cell_colors
+from gym_examples.envs.tetris import (
+    screen_width,
+    screen_height,
+    play_width,
+    play_height,
+    block_size,
+    top_left_x,
+    top_left_y,
+)
+
+
+# 带缓存的Tetris渲染器：字体、静态背景和网格线只生成一次，
+# 之后每帧只重绘与上一帧相比发生变化的格子，画面与draw_window相同
+class TetrisRenderer:
+    def __init__(self, surface):
+        self.surface = surface
+        self.dirty = []  # 本帧发生变化的区域，可传给pygame.display.update
+
+        pygame.font.init()
+        self.title_font = pygame.font.Font(pygame.font.get_default_font(), 30)
+        self.score_font = pygame.font.Font(pygame.font.get_default_font(), 25)
+
+        # 静态背景：黑色底色和标题
+        self.background = pygame.Surface((screen_width, screen_height))
+        self.background.fill((0, 0, 0))
+        label = self.title_font.render("Tetris", 1, (255, 255, 255))
+        self.background.blit(
+            label, (top_left_x + play_width / 2 - (label.get_width() / 2), 30)
+        )
+
+        # 网格层：网格线和红色边框，画在格子上面，黑色为透明色
+        self.grid_layer = pygame.Surface((screen_width, screen_height))
+        self.grid_layer.fill((0, 0, 0))
+        self.grid_layer.set_colorkey((0, 0, 0))
+        sx = top_left_x
+        sy = top_left_y
+        for i in range(board_height):
+            pygame.draw.line(
+                self.grid_layer,
+                (128, 128, 128),
+                (sx, sy + i * block_size),
+                (sx + play_width, sy + i * block_size),
+            )
+        for j in range(board_width):
+            pygame.draw.line(
+                self.grid_layer,
+                (128, 128, 128),
+                (sx + j * block_size, sy),
+                (sx + j * block_size, sy + play_height),
+            )
+        pygame.draw.rect(
+            self.grid_layer,
+            (255, 0, 0),
+            (top_left_x, top_left_y, play_width, play_height),
+            5,
+        )
+
+        self.score_pos = (
+            top_left_x + play_width + 50 + 20,
+            top_left_y + play_height / 2 - 100 + 160,
+        )
+        self.score_rect = None
+        self.score = None
+        self.cells = None  # 上一帧的格子
+
+    # 重绘整个画面
+    def _redraw(self, cells, score):
+        self.surface.blit(self.background, (0, 0))
+        for i in range(board_height):
+            for j in range(board_width):
+                self._draw_cell(i, j, cells[i, j])
+        self.surface.blit(self.grid_layer, (0, 0))
+        self.score_rect = None
+        self._draw_score(score)
+        self.dirty = [self.surface.get_rect()]
+
+    def _draw_cell(self, i, j, cell):
+        rect = pygame.Rect(
+            top_left_x + j * block_size,
+            top_left_y + i * block_size,
+            block_size,
+            block_size,
+        )
+        pygame.draw.rect(self.surface, cell_colors[cell], rect, 0)
+        return rect
+
+    def _draw_score(self, score):
+        if self.score_rect is not None:
+            self.surface.blit(self.background, self.score_rect, self.score_rect)
+        label = self.score_font.render(f"Score: {score}", 1, (255, 255, 255))
+        self.score_rect = self.surface.blit(label, self.score_pos)
+        self.score = score
+        return self.score_rect
+
+    # 绘制一帧，cells为20x10的形状编号数组（0为空格）
+    def draw(self, cells, score=0):
+        if self.cells is None:
+            self.cells = cells.copy()
+            self._redraw(cells, score)
+            return self.surface
+
+        self.dirty = []
+        ys, xs = np.nonzero(cells != self.cells)
+        for i, j in zip(ys.tolist(), xs.tolist()):
+            rect = self._draw_cell(i, j, cells[i, j])
+            # 重新叠加该格子上的网格线和边框
+            rect = rect.inflate(4, 4)
+            self.surface.blit(self.grid_layer, rect, rect)
+            self.dirty.append(rect)
+        np.copyto(self.cells, cells)
+
+        if score != self.score:
+            old = self.score_rect
+            self.dirty.append(self._draw_score(score).union(old))
+        return self.surface
+
+    # 强制下一帧整体重绘，例如窗口被覆盖之后
+    def invalidate(self):
+        self.cells = None
+
+    # 把画面复制为(H, W, 3)的RGB数组，可以传入预先分配的out
+    def to_rgb_array(self, out=None):
+        if out is None:
+            out = np.empty((screen_height, screen_width, 3), dtype=np.uint8)
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        np.copyto(out, pixels.transpose(1, 0, 2))
+        del pixels
+        return out
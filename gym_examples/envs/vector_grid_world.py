@@ -0,0 +1,86 @@
+from gym import spaces
+from gym.utils import seeding
+from gym.vector import VectorEnv
+import numpy as np
+
+
+# 批量版的GridWorldEnv：N个环境的智能体和目标位置保存在(N, 2)数组中
+class VectorGridWorldEnv(VectorEnv):
+    metadata = {"render_modes": [], "autoreset": True}
+
+    def __init__(self, num_envs, size=5, copy=True):
+        self.size = size  # 方格世界的大小
+        self.copy = copy  # 是否返回观测的副本；为False时返回内部缓冲区
+
+        observation_space = spaces.Dict(
+            {
+                "agent": spaces.Box(0, size - 1, shape=(2,), dtype=int),
+                "target": spaces.Box(0, size - 1, shape=(2,), dtype=int),
+            }
+        )
+        super().__init__(num_envs, observation_space, spaces.Discrete(4))
+
+        # 动作到方向的查找表，顺序与GridWorldEnv._action_to_direction相同
+        self._directions = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+
+        self._agent_location = np.zeros((num_envs, 2), dtype=int)
+        self._target_location = np.zeros((num_envs, 2), dtype=int)
+        self._move = np.zeros((num_envs, 2), dtype=int)
+        self._arange = np.arange(num_envs)
+
+        self._np_random, _ = seeding.np_random()
+
+    def _get_obs(self):
+        if self.copy:
+            return {
+                "agent": self._agent_location.copy(),
+                "target": self._target_location.copy(),
+            }
+        return {"agent": self._agent_location, "target": self._target_location}
+
+    # 重置指定下标的环境，采样规则与GridWorldEnv.reset相同
+    def _reset_envs(self, idx):
+        self._agent_location[idx] = self._np_random.integers(
+            0, self.size, size=(len(idx), 2), dtype=int
+        )
+        # 随机选择目标的位置，直到它与智能体的位置不同
+        pending = idx
+        while len(pending):
+            self._target_location[pending] = self._np_random.integers(
+                0, self.size, size=(len(pending), 2), dtype=int
+            )
+            same = (
+                self._target_location[pending] == self._agent_location[pending]
+            ).all(axis=1)
+            pending = pending[same]
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self._np_random, seed = seeding.np_random(seed)
+        self._reset_envs(self._arange)
+        return self._get_obs(), {}
+
+    def step(self, actions):
+        # 用查找表一次取出所有方向，原地移动并裁剪到网格内
+        np.take(self._directions, actions, axis=0, out=self._move)
+        self._agent_location += self._move
+        np.clip(self._agent_location, 0, self.size - 1, out=self._agent_location)
+
+        terminated = (self._agent_location == self._target_location).all(axis=1)
+        reward = terminated.astype(int)  # 二进制稀疏奖励
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        # 自动重置到达目标的环境；结束时智能体与目标重合。
+        # 与gym的向量环境相同，final_observation是长度为N的object数组，未结束的环境为None
+        info = {}
+        done = np.flatnonzero(terminated)
+        if len(done):
+            final = np.full(self.num_envs, None, dtype=object)
+            for i in done:
+                target = self._target_location[i]
+                final[i] = {"agent": target.copy(), "target": target.copy()}
+            info["final_observation"] = final
+            info["_final_observation"] = terminated
+            self._reset_envs(done)
+
+        return self._get_obs(), reward, terminated, truncated, info
@@ -0,0 +1,220 @@
+import numpy as np
+from gymnasium import spaces
+from gymnasium.utils import seeding
+from gymnasium.vector import VectorEnv
+
+from gym_examples.envs.bitboard import (
+    board_width,
+    board_height,
+    shape_cells,
+    rotation_counts,
+)
+from gym_examples.envs.tetris_raster import TetrisRasterizer
+
+# 动作对应的位移：左、右、旋转、下
+action_dx = np.array([-1, 1, 0, 0])
+action_dy = np.array([0, 0, 0, 1])
+action_rotate = np.array([0, 0, 1, 0])
+
+
+# 批量版的TetrisEnv：N个棋盘保存在一个(N, 20, 10)的uint8数组中，
+# 重力、移动、旋转、碰撞、锁定和消行都对所有棋盘一次完成。
+# 规则与TetrisEnv在gravity="ticks"模式下的step相同。
+class VectorTetrisEnv(VectorEnv):
+    metadata = {
+        "render_modes": [],
+        "render_fps": 60,
+        "autoreset": True,
+        "obs_modes": ["cells", "pixels"],
+    }
+
+    def __init__(
+        self,
+        num_envs,
+        frames_per_step=1,
+        copy=True,
+        obs_mode="cells",
+        cell_size=4,
+        grayscale=False,
+        downsample=1,
+    ):
+        # 观测：
+        # "cells"：0为空格，k为第k-1种形状（包含当前下落的方块）
+        # "pixels"：用TetrisRasterizer批量放大得到的游戏区图像
+        assert obs_mode in self.metadata["obs_modes"]
+        self.obs_mode = obs_mode
+        self.rasterizer = None
+        if obs_mode == "pixels":
+            self.rasterizer = TetrisRasterizer(cell_size, grayscale, downsample)
+            observation_space = spaces.Box(
+                low=0, high=255, shape=self.rasterizer.shape, dtype=np.uint8
+            )
+        else:
+            observation_space = spaces.Box(
+                low=0,
+                high=len(rotation_counts),
+                shape=(board_height, board_width),
+                dtype=np.uint8,
+            )
+        super().__init__(num_envs, observation_space, spaces.Discrete(4))
+
+        assert frames_per_step > 0
+        self.frames_per_step = frames_per_step
+        self.step_ms = frames_per_step * 1000 / self.metadata["render_fps"]
+        self.copy = copy
+
+        n = num_envs
+        self.boards = np.zeros((n, board_height, board_width), dtype=np.uint8)  # 已锁定的方块
+        self.shape = np.zeros(n, dtype=np.int64)
+        self.next_shape = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.fall_time = np.zeros(n)
+        self.level_time = np.zeros(n)
+        self.fall_speed = np.zeros(n)
+        self._obs = np.zeros((n, board_height, board_width), dtype=np.uint8)
+        if self.rasterizer is not None:
+            self._pixels = np.zeros((n,) + self.rasterizer.shape, dtype=np.uint8)
+        self._arange = np.arange(n)
+
+        self._np_random, _ = seeding.np_random()
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._np_random, seed = seeding.np_random(seed)
+        self._reset_boards(self._arange)
+        return self._get_obs(), {}
+
+    # 重置指定下标的棋盘
+    def _reset_boards(self, idx):
+        self.boards[idx] = 0
+        self.shape[idx] = self._np_random.integers(len(rotation_counts), size=len(idx))
+        self.next_shape[idx] = self._np_random.integers(
+            len(rotation_counts), size=len(idx)
+        )
+        self.x[idx] = 5
+        self.y[idx] = 0
+        self.rotation[idx] = 0
+        self.fall_time[idx] = 0
+        self.level_time[idx] = 0
+        self.fall_speed[idx] = 0.27
+
+    # 方块各格的坐标，形状为(len(idx), 4)
+    def _cells(self, idx, x, y, rotation):
+        offsets = shape_cells[self.shape[idx], rotation]
+        return x[:, None] + offsets[..., 0], y[:, None] + offsets[..., 1]
+
+    # 批量版的valid_space：游戏区上方的格子只检查左右边界
+    def _valid(self, idx, x, y, rotation):
+        cx, cy = self._cells(idx, x, y, rotation)
+        inside = (cx >= 0) & (cx < board_width) & (cy < board_height)
+        occupied = (
+            self.boards[
+                idx[:, None],
+                np.clip(cy, 0, board_height - 1),
+                np.clip(cx, 0, board_width - 1),
+            ]
+            != 0
+        )
+        return (inside & ((cy < 0) | ~occupied)).all(axis=1)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        idx = self._arange
+        reward = np.zeros(self.num_envs)
+
+        self.fall_time += self.step_ms
+        self.level_time += self.step_ms
+
+        # 每经过5秒，增加游戏难度
+        level_up = self.level_time / 1000 > 5
+        self.level_time[level_up] = 0
+        self.fall_speed[level_up & (self.fall_speed > 0.12)] -= 0.005
+
+        # 方块下落逻辑
+        fall = self.fall_time / 1000 >= self.fall_speed
+        self.fall_time[fall] = 0
+        self.y[fall] += 1
+        blocked = fall & ~self._valid(idx, self.x, self.y, self.rotation) & (self.y > 0)
+        self.y[blocked] -= 1
+        change_piece = blocked
+
+        # 根据动作移动方块，不合法的移动撤销
+        x = self.x + action_dx[actions]
+        y = self.y + action_dy[actions]
+        rotation = (self.rotation + action_rotate[actions]) % rotation_counts[
+            self.shape
+        ]
+        ok = self._valid(idx, x, y, rotation)
+        self.x[ok] = x[ok]
+        self.y[ok] = y[ok]
+        self.rotation[ok] = rotation[ok]
+
+        # 锁定方块、消行并更换方块
+        topped_out = np.zeros(self.num_envs, dtype=bool)
+        locked = np.flatnonzero(change_piece)
+        if len(locked):
+            cx, cy = self._cells(
+                locked, self.x[locked], self.y[locked], self.rotation[locked]
+            )
+            visible = cy >= 0
+            topped_out[locked] = ~visible.all(axis=1)
+            rows = np.broadcast_to(locked[:, None], cx.shape)
+            colors = np.broadcast_to((self.shape[locked] + 1)[:, None], cx.shape)
+            self.boards[rows[visible], cy[visible], cx[visible]] = colors[visible]
+            reward[locked] += self._clear_rows(locked) * 10
+
+            self.shape[locked] = self.next_shape[locked]
+            self.next_shape[locked] = self._np_random.integers(
+                len(rotation_counts), size=len(locked)
+            )
+            self.x[locked] = 5
+            self.y[locked] = 0
+            self.rotation[locked] = 0
+
+        # 检查游戏是否结束
+        terminated = topped_out | (self.boards[:, 0] != 0).any(axis=1)
+        reward[terminated] -= 50
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        # 自动重置结束的棋盘。与gymnasium的向量环境相同，
+        # final_observation是长度为N的object数组，未结束的棋盘为None
+        info = {}
+        done = np.flatnonzero(terminated)
+        if len(done):
+            final_obs = self._get_obs()[done]
+            final = np.full(self.num_envs, None, dtype=object)
+            for k, i in enumerate(done):
+                final[i] = final_obs[k]
+            info["final_observation"] = final
+            info["_final_observation"] = terminated
+            self._reset_boards(done)
+
+        return self._get_obs(), reward, terminated, truncated, info
+
+    # 批量版的clear_rows：满行移到顶部并清零，其余行保持顺序下移
+    def _clear_rows(self, idx):
+        boards = self.boards[idx]
+        full = (boards != 0).all(axis=2)
+        increment = full.sum(axis=1)
+        cleared = increment > 0
+        if cleared.any():
+            order = np.argsort(~full[cleared], axis=1, kind="stable")
+            compacted = np.take_along_axis(boards[cleared], order[:, :, None], axis=1)
+            compacted[np.arange(board_height) < increment[cleared, None]] = 0
+            self.boards[idx[cleared]] = compacted
+        return increment
+
+    # 观测：已锁定的方块加上当前方块
+    def _get_obs(self):
+        obs = self._obs
+        np.copyto(obs, self.boards)
+        cx, cy = self._cells(self._arange, self.x, self.y, self.rotation)
+        visible = (cy >= 0) & (cy < board_height)
+        rows = np.broadcast_to(self._arange[:, None], cx.shape)
+        colors = np.broadcast_to((self.shape + 1)[:, None], cx.shape)
+        obs[rows[visible], cy[visible], cx[visible]] = colors[visible]
+        if self.rasterizer is not None:
+            obs = self.rasterizer.draw_batch(obs, out=self._pixels)
+        return obs.copy() if self.copy else obs
@@ -0,0 +1,213 @@
+"""Run seeded evaluation episodes of an environment across a process pool.
+
+Example::
+
+    python -m gym_examples.rollout gym_examples/Tetris-v0 --episodes 64 \\
+        --env-kwargs '{"gravity": "ticks", "action_mode": "placement"}' \\
+        --policy gym_examples.rollout:random_policy --output results.json
+
+Each finished episode is printed as one JSON line, followed by aggregate
+statistics. Returns and lengths depend only on ``--seed``, not on the number
+of workers or the order in which episodes finish (for Tetris this requires
+``"gravity": "ticks"``; realtime gravity follows the wall clock).
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import time
+
+import gym
+import numpy as np
+
+
+# 随机策略：按info中的action_mask（如果有）从动作空间中采样。
+# 动作空间在每个episode开始时用episode的种子重新设置，所以结果可以复现
+def random_policy(env):
+    def act(observation, info):
+        mask = info.get("action_mask")
+        if mask is not None:
+            return env.action_space.sample(mask=mask)
+        return env.action_space.sample()
+
+    return act
+
+
+# 导入"module:attribute"形式的对象
+def load_callable(path):
+    module, _, name = path.partition(":")
+    obj = importlib.import_module(module)
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+# 创建环境："module:Class"形式时直接构造，否则交给gym.make（可以是"module:EnvId"）
+def make_env(env_id, env_kwargs):
+    module, _, name = env_id.partition(":")
+    if name and all(part.isidentifier() for part in name.split(".")):
+        return load_callable(env_id)(**env_kwargs)
+    return gym.make(env_id, **env_kwargs)
+
+
+# 每个episode的种子：由--seed派生，与episode的编号一一对应
+def episode_seeds(seed, episodes):
+    return np.random.SeedSequence(seed).generate_state(episodes).tolist()
+
+
+# 工作进程中的环境和策略工厂，每个进程只创建一次环境
+_worker = {}
+
+
+def _init_worker(env_id, env_kwargs, policy, max_steps):
+    _worker["env"] = make_env(env_id, env_kwargs)
+    _worker["make_policy"] = load_callable(policy)
+    _worker["max_steps"] = max_steps
+
+
+# 运行一个episode。策略工厂在每个episode开始时调用一次，
+# 所以策略的内部状态不会跨episode影响结果
+def _run_episode(job):
+    index, seed = job
+    env = _worker["env"]
+    start = time.perf_counter()
+    observation, info = env.reset(seed=seed)
+    env.action_space.seed(seed)
+    act = _worker["make_policy"](env)
+    episode_return = 0.0
+    length = 0
+    terminated = truncated = False
+    while not (terminated or truncated):
+        observation, reward, terminated, truncated, info = env.step(
+            act(observation, info)
+        )
+        episode_return += float(reward)
+        length += 1
+        truncated = truncated or (not terminated and length >= _worker["max_steps"])
+    elapsed = time.perf_counter() - start
+    return {
+        "episode": index,
+        "seed": seed,
+        "return": episode_return,
+        "length": length,
+        "terminated": bool(terminated),
+        "truncated": bool(truncated),
+        "time_sec": elapsed,
+        "steps_per_sec": length / elapsed if elapsed > 0 else float("inf"),
+        "pid": os.getpid(),
+    }
+
+
+def summarize(episodes, wall_time):
+    returns = np.array([episode["return"] for episode in episodes])
+    lengths = np.array([episode["length"] for episode in episodes])
+    return {
+        "episodes": len(episodes),
+        "return_mean": float(returns.mean()),
+        "return_std": float(returns.std()),
+        "return_min": float(returns.min()),
+        "return_max": float(returns.max()),
+        "length_mean": float(lengths.mean()),
+        "total_steps": int(lengths.sum()),
+        "wall_time_sec": wall_time,
+        "steps_per_sec": float(lengths.sum()) / wall_time,
+    }
+
+
+# 运行episodes个episode，每结束一个就调用一次on_episode，返回按编号排序的结果和汇总统计
+def rollout(
+    env_id,
+    policy,
+    episodes,
+    seed=0,
+    workers=None,
+    env_kwargs=None,
+    max_steps=10_000,
+    on_episode=None,
+):
+    if episodes < 1:
+        raise ValueError(f"episodes must be at least 1, got {episodes}")
+    env_kwargs = env_kwargs or {}
+    workers = min(workers or os.cpu_count() or 1, episodes)
+    jobs = list(enumerate(episode_seeds(seed, episodes)))
+    init_args = (env_id, env_kwargs, policy, max_steps)
+    results = []
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(*init_args)
+        finished = map(_run_episode, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=init_args
+        )
+        finished = pool.imap_unordered(_run_episode, jobs)
+    try:
+        for episode in finished:
+            results.append(episode)
+            if on_episode is not None:
+                on_episode(episode)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    wall_time = time.perf_counter() - start
+    results.sort(key=lambda episode: episode["episode"])
+    return results, summarize(results, wall_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("env", help="registered env id, or module:Class")
+    parser.add_argument(
+        "--policy",
+        default="gym_examples.rollout:random_policy",
+        help="module:callable that takes the env and returns act(observation, info)",
+    )
+    parser.add_argument("--episodes", type=int, default=100, help="number of episodes")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed the episode seeds are derived from"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: all cores)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=10_000,
+        help="truncate episodes after this many steps",
+    )
+    parser.add_argument(
+        "--env-kwargs",
+        type=json.loads,
+        default={},
+        help="JSON dict of env constructor arguments",
+    )
+    parser.add_argument("--output", help="write episodes and summary to this JSON file")
+    args = parser.parse_args(argv)
+    if args.episodes < 1:
+        parser.error("--episodes must be at least 1")
+
+    episodes, summary = rollout(
+        args.env,
+        args.policy,
+        args.episodes,
+        seed=args.seed,
+        workers=args.workers,
+        env_kwargs=args.env_kwargs,
+        max_steps=args.max_steps,
+        on_episode=lambda episode: print(json.dumps(episode), flush=True),
+    )
+    print(json.dumps({"summary": summary}), flush=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"episodes": episodes, "summary": summary}, f, indent=2)
+    return episodes, summary
+
+
+if __name__ == "__main__":
+    main()
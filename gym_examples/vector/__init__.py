@@ -0,0 +1 @@
+from gym_examples.vector.shared_memory_vector_env import SharedMemoryVectorEnv
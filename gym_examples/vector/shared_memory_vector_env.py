@@ -0,0 +1,216 @@
+import copy
+import multiprocessing as mp
+
+from gym.vector import VectorEnv
+from gym.vector.utils import CloudpickleWrapper, batch_space
+import gymnasium
+import numpy as np
+
+
+# 为一个观测空间分配共享内存，支持Box、Discrete以及由它们组成的Dict
+def _create_shared(space, n, ctx):
+    kind = type(space).__name__
+    if kind == "Dict":
+        return {key: _create_shared(sub, n, ctx) for key, sub in space.spaces.items()}
+    if kind == "Box":
+        nbytes = n * int(np.prod(space.shape)) * np.dtype(space.dtype).itemsize
+        return ctx.RawArray("b", nbytes)
+    if kind == "Discrete":
+        return ctx.RawArray("b", n * np.dtype(np.int64).itemsize)
+    raise TypeError(f"Unsupported observation space for shared memory: {space}")
+
+
+# 把共享内存包装成NumPy数组（不复制）
+def _as_arrays(shared, space, n):
+    kind = type(space).__name__
+    if kind == "Dict":
+        return {
+            key: _as_arrays(shared[key], sub, n) for key, sub in space.spaces.items()
+        }
+    if kind == "Box":
+        return np.frombuffer(shared, dtype=space.dtype).reshape((n,) + space.shape)
+    return np.frombuffer(shared, dtype=np.int64)
+
+
+# 把单个环境的观测写入共享数组的第i个位置
+def _write(arrays, i, obs):
+    if isinstance(arrays, dict):
+        for key, array in arrays.items():
+            _write(array, i, obs[key])
+    else:
+        arrays[i] = obs
+
+
+def _copy(arrays):
+    if isinstance(arrays, dict):
+        return {key: _copy(array) for key, array in arrays.items()}
+    return arrays.copy()
+
+
+def _worker(remote, parent_remote, env_fns, start, shared, observation_space, num_envs):
+    parent_remote.close()
+    envs = [env_fn() for env_fn in env_fns.fn]
+    obs_arrays = _as_arrays(shared["obs"], observation_space, num_envs)
+    rewards = np.frombuffer(shared["rewards"], dtype=np.float64)
+    terminateds = np.frombuffer(shared["terminateds"], dtype=np.bool_)
+    truncateds = np.frombuffer(shared["truncateds"], dtype=np.bool_)
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "reset":
+                seeds, options = data
+                infos = []
+                for k, env in enumerate(envs):
+                    obs, info = env.reset(seed=seeds[k], options=options)
+                    _write(obs_arrays, start + k, obs)
+                    infos.append(info)
+                remote.send(infos)
+            elif command == "step":
+                infos = []
+                for k, (env, action) in enumerate(zip(envs, data)):
+                    i = start + k
+                    obs, reward, terminated, truncated, info = env.step(action)
+                    # 自动重置结束的环境，最后的观测放在info中。
+                    # 环境可能在reset时原地覆盖同一个观测缓冲区，所以先复制
+                    if terminated or truncated:
+                        old_obs, old_info = copy.deepcopy(obs), info
+                        obs, info = env.reset()
+                        info["final_observation"] = old_obs
+                        info["final_info"] = old_info
+                    _write(obs_arrays, i, obs)
+                    rewards[i] = reward
+                    terminateds[i] = terminated
+                    truncateds[i] = truncated
+                    infos.append(info)
+                remote.send(infos)
+            elif command == "close":
+                break
+            else:
+                raise RuntimeError(f"Received unknown command `{command}`.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        remote.close()
+
+
+# 多进程向量环境：观测、奖励和结束标志预先分配在共享内存中，
+# 子进程直接原地写入，管道上只传动作和info，不序列化观测
+class SharedMemoryVectorEnv(VectorEnv):
+    def __init__(self, env_fns, envs_per_worker=1, context=None, copy=True):
+        dummy_env = env_fns[0]()
+        observation_space = dummy_env.observation_space
+        action_space = dummy_env.action_space
+        self.metadata = dummy_env.metadata
+        dummy_env.close()
+        del dummy_env
+
+        # 同时支持gym和gymnasium的环境（TetrisEnv使用gymnasium的空间），
+        # gym的batch_space不接受gymnasium的空间，所以这里不调用VectorEnv.__init__
+        if isinstance(observation_space, gymnasium.spaces.Space):
+            batch = gymnasium.vector.utils.batch_space
+        else:
+            batch = batch_space
+        self.num_envs = len(env_fns)
+        self.is_vector_env = True
+        self.observation_space = batch(observation_space, n=self.num_envs)
+        self.action_space = batch(action_space, n=self.num_envs)
+        self.single_observation_space = observation_space
+        self.single_action_space = action_space
+        self.closed = False
+        self.viewer = None
+
+        self.copy = copy  # 是否返回观测的副本；为False时返回共享内存中的数组
+        ctx = mp.get_context(context)
+        n = self.num_envs
+        shared = {
+            "obs": _create_shared(observation_space, n, ctx),
+            "rewards": ctx.RawArray("d", n),
+            "terminateds": ctx.RawArray("b", n),
+            "truncateds": ctx.RawArray("b", n),
+        }
+        self._obs = _as_arrays(shared["obs"], observation_space, n)
+        self._rewards = np.frombuffer(shared["rewards"], dtype=np.float64)
+        self._terminateds = np.frombuffer(shared["terminateds"], dtype=np.bool_)
+        self._truncateds = np.frombuffer(shared["truncateds"], dtype=np.bool_)
+
+        # 每个子进程负责连续的envs_per_worker个环境
+        self._slices = [
+            slice(start, min(start + envs_per_worker, n))
+            for start in range(0, n, envs_per_worker)
+        ]
+        self.remotes, self.processes = [], []
+        for s in self._slices:
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    worker_remote,
+                    remote,
+                    CloudpickleWrapper(env_fns[s]),
+                    s.start,
+                    shared,
+                    observation_space,
+                    n,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self._waiting = False
+
+    def _collect_infos(self):
+        infos = {}
+        for s, remote in zip(self._slices, self.remotes):
+            for i, info in enumerate(remote.recv(), start=s.start):
+                infos = self._add_info(infos, info, i)
+        self._waiting = False
+        return infos
+
+    def _get_obs(self):
+        return _copy(self._obs) if self.copy else self._obs
+
+    def reset_async(self, seed=None, options=None):
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        for s, remote in zip(self._slices, self.remotes):
+            remote.send(("reset", (seed[s], options)))
+        self._waiting = True
+
+    def reset_wait(self, seed=None, options=None):
+        infos = self._collect_infos()
+        return self._get_obs(), infos
+
+    def step_async(self, actions):
+        for s, remote in zip(self._slices, self.remotes):
+            remote.send(("step", actions[s]))
+        self._waiting = True
+
+    def step_wait(self):
+        infos = self._collect_infos()
+        return (
+            self._get_obs(),
+            self._rewards.copy(),
+            self._terminateds.copy(),
+            self._truncateds.copy(),
+            infos,
+        )
+
+    def close_extras(self, timeout=None, terminate=False):
+        if self._waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join(timeout)
+            if terminate and process.is_alive():
+                process.terminate()
+        for remote in self.remotes:
+            remote.close()
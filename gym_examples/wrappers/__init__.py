@@ -2,3 +2,13 @@ from gym_examples.wrappers.clip_reward import ClipReward
 from gym_examples.wrappers.discrete_actions import DiscreteActions
 from gym_examples.wrappers.reacher_weighted_reward import ReacherRewardWrapper
 from gym_examples.wrappers.relative_position import RelativePosition
+from gym_examples.wrappers.trajectory_recorder import (
+    TrajectoryRecorder,
+    TrajectoryReader,
+)
+from gym_examples.wrappers.video_recorder import VideoRecorder
+from gym_examples.wrappers.vector_wrapper import VectorWrapper
+from gym_examples.wrappers.vector_clip_reward import VectorClipReward
+from gym_examples.wrappers.vector_discrete_actions import VectorDiscreteActions
+from gym_examples.wrappers.vector_relative_position import VectorRelativePosition
+from gym_examples.wrappers.fused_wrapper import FusedWrapper
@@ -0,0 +1,60 @@
+import gym
+
+
+# 判断w是否是只重写了action/reward/observation的简单包装器，这类包装器可以被融合
+def _fusable(w):
+    cls = type(w)
+    if isinstance(w, gym.ObservationWrapper):
+        return (
+            cls.step is gym.ObservationWrapper.step
+            and cls.reset is gym.ObservationWrapper.reset
+        )
+    for base in (gym.ActionWrapper, gym.RewardWrapper):
+        if isinstance(w, base):
+            return cls.step is base.step and cls.reset is gym.Wrapper.reset
+    return False
+
+
+# 把一串ActionWrapper/RewardWrapper/ObservationWrapper融合成一个包装器，
+# 例如FusedWrapper(RelativePosition(ClipReward(DiscreteActions(env))))。
+# 各层的action/reward/observation方法在一次step中依次调用，
+# 省去逐层的Wrapper.step调用、属性转发和元组重新打包。
+# 空间和reward_range取自最外层的包装器；遇到其他包装器时停止融合。
+class FusedWrapper(gym.Wrapper):
+    def __init__(self, env):
+        outer = env
+        action_fns, reward_fns, observation_fns = [], [], []
+        while _fusable(env):
+            if isinstance(env, gym.ActionWrapper):
+                action_fns.append(env.action)
+            elif isinstance(env, gym.RewardWrapper):
+                reward_fns.append(env.reward)
+            else:
+                observation_fns.append(env.observation)
+            env = env.env
+        super().__init__(env)
+
+        self.action_space = outer.action_space
+        self.observation_space = outer.observation_space
+        self.reward_range = outer.reward_range
+
+        # 动作从外到内变换，观测和奖励从内到外变换
+        self._action_fns = tuple(action_fns)
+        self._reward_fns = tuple(reversed(reward_fns))
+        self._observation_fns = tuple(reversed(observation_fns))
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        for fn in self._observation_fns:
+            obs = fn(obs)
+        return obs, info
+
+    def step(self, action):
+        for fn in self._action_fns:
+            action = fn(action)
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        for fn in self._observation_fns:
+            obs = fn(obs)
+        for fn in self._reward_fns:
+            reward = fn(reward)
+        return obs, reward, terminated, truncated, info
@@ -0,0 +1,256 @@
+import json
+import os
+
+import gym
+import numpy as np
+
+
+# 观测的存储布局：Dict观测按键展平成一维，Discrete存为一个整数，Box保持原形状
+def _obs_layout(space, flatten):
+    kind = type(space).__name__
+    if kind == "Dict" and flatten:
+        keys, offset, dtypes = [], 0, []
+        for key, sub in space.spaces.items():
+            shape = () if type(sub).__name__ == "Discrete" else tuple(sub.shape)
+            size = int(np.prod(shape))
+            keys.append([key, offset, size, list(shape)])
+            offset += size
+            dtypes.append(np.int64 if shape == () else sub.dtype)
+        return {"shape": [offset], "dtype": np.result_type(*dtypes).str, "keys": keys}
+    if kind == "Discrete":
+        return {"shape": [], "dtype": np.dtype(np.int64).str, "keys": None}
+    if kind == "Box":
+        return {
+            "shape": list(space.shape),
+            "dtype": np.dtype(space.dtype).str,
+            "keys": None,
+        }
+    raise TypeError(f"Unsupported space for recording: {space}")
+
+
+# 把一个观测写入内存映射数组的一行，Dict观测原地展平
+def _write_obs(row_array, i, obs, keys):
+    if keys is None:
+        row_array[i] = obs
+        return
+    row = row_array[i]
+    for key, offset, size, _ in keys:
+        row[offset : offset + size] = np.ravel(obs[key])
+
+
+# 把TrajectoryRecorder展平的观测还原成字典（返回的是视图，不复制）
+def unflatten_obs(obs, keys):
+    return {
+        key: obs[..., offset : offset + size].reshape(obs.shape[:-1] + tuple(shape))
+        for key, offset, size, shape in keys
+    }
+
+
+# 把每一步的观测、动作、奖励和结束标志写入预先分配、分块的内存映射.npy文件，
+# 并记录每个episode的起止位置。用TrajectoryReader读取。
+class TrajectoryRecorder(gym.Wrapper):
+    fields = (
+        "observations",
+        "actions",
+        "rewards",
+        "terminated",
+        "truncated",
+        "next_observations",
+    )
+
+    def __init__(self, env, directory, chunk_size=100_000, flatten_obs=True):
+        super().__init__(env)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+
+        obs_layout = _obs_layout(env.observation_space, flatten_obs)
+        action_layout = _obs_layout(env.action_space, False)
+        self.layouts = {
+            "observations": obs_layout,
+            "actions": action_layout,
+            "rewards": {"shape": [], "dtype": np.dtype(np.float32).str, "keys": None},
+            "terminated": {"shape": [], "dtype": np.dtype(np.bool_).str, "keys": None},
+            "truncated": {"shape": [], "dtype": np.dtype(np.bool_).str, "keys": None},
+            "next_observations": obs_layout,
+        }
+        self._obs_keys = obs_layout["keys"]
+        # 环境可能每步原地覆盖同一个观测缓冲区，所以不保留环境返回的数组：
+        # reset的观测复制到这个暂存行中，之后上一步的观测就是上一行的next_observations
+        self._reset_obs = np.empty(
+            (1,) + tuple(obs_layout["shape"]), dtype=np.dtype(obs_layout["dtype"])
+        )
+
+        self.num_transitions = 0
+        self.episodes = []  # 每个episode的(起始位置, 长度)
+        self._episode_start = None
+        self._last_obs = None  # 上一步观测所在的(数组, 行)
+        self._chunk = None
+        self._chunk_index = -1
+        self._pos = 0  # 当前块中的写入位置
+
+    def _chunk_path(self, index, field):
+        return os.path.join(self.directory, f"chunk_{index:05d}_{field}.npy")
+
+    def _new_chunk(self):
+        self._flush_chunk()
+        self._chunk_index += 1
+        self._chunk = {
+            field: np.lib.format.open_memmap(
+                self._chunk_path(self._chunk_index, field),
+                mode="w+",
+                dtype=np.dtype(layout["dtype"]),
+                shape=(self.chunk_size,) + tuple(layout["shape"]),
+            )
+            for field, layout in self.layouts.items()
+        }
+        self._pos = 0
+
+    def _flush_chunk(self):
+        if self._chunk is not None:
+            for array in self._chunk.values():
+                array.flush()
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._end_episode()
+        self._episode_start = self.num_transitions
+        _write_obs(self._reset_obs, 0, obs, self._obs_keys)
+        self._last_obs = (self._reset_obs, 0)
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        if self._chunk is None or self._pos == self.chunk_size:
+            self._new_chunk()
+        chunk, i = self._chunk, self._pos
+        last_array, last_i = self._last_obs
+        chunk["observations"][i] = last_array[last_i]
+        chunk["actions"][i] = action
+        chunk["rewards"][i] = reward
+        chunk["terminated"][i] = terminated
+        chunk["truncated"][i] = truncated
+        _write_obs(chunk["next_observations"], i, obs, self._obs_keys)
+        self._pos += 1
+        self.num_transitions += 1
+        self._last_obs = (chunk["next_observations"], i)
+        if terminated or truncated:
+            self._end_episode()
+        return obs, reward, terminated, truncated, info
+
+    def _end_episode(self):
+        if self._episode_start is not None:
+            length = self.num_transitions - self._episode_start
+            if length > 0:
+                self.episodes.append((self._episode_start, length))
+        self._episode_start = None
+
+    # 把当前的数据和索引写入磁盘；close时会自动调用
+    def save(self):
+        self._flush_chunk()
+        episodes = list(self.episodes)
+        if (
+            self._episode_start is not None
+            and self.num_transitions > self._episode_start
+        ):
+            # 未结束的episode也写入索引
+            episodes.append(
+                (self._episode_start, self.num_transitions - self._episode_start)
+            )
+        np.save(
+            os.path.join(self.directory, "episodes.npy"),
+            np.array(episodes, dtype=np.int64).reshape(-1, 2),
+        )
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(
+                {
+                    "chunk_size": self.chunk_size,
+                    "num_chunks": self._chunk_index + 1,
+                    "num_transitions": self.num_transitions,
+                    "fields": self.layouts,
+                },
+                f,
+                indent=2,
+            )
+
+    def close(self):
+        self._end_episode()
+        self.save()
+        self._chunk = None
+        return self.env.close()
+
+
+# 读取TrajectoryRecorder写入的数据：所有块都以只读内存映射的方式打开，
+# 取单个转移或位于同一块内的episode时返回视图，不复制数据
+class TrajectoryReader:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.chunk_size = meta["chunk_size"]
+        self.num_transitions = meta["num_transitions"]
+        self.layouts = meta["fields"]
+        self.obs_keys = self.layouts["observations"]["keys"]
+        self.episodes = np.load(os.path.join(directory, "episodes.npy"))
+        self.chunks = [
+            {
+                field: np.load(
+                    os.path.join(directory, f"chunk_{index:05d}_{field}.npy"),
+                    mmap_mode="r",
+                )
+                for field in self.layouts
+            }
+            for index in range(meta["num_chunks"])
+        ]
+
+    def __len__(self):
+        return self.num_transitions
+
+    @property
+    def num_episodes(self):
+        return len(self.episodes)
+
+    def transition(self, i):
+        if not 0 <= i < self.num_transitions:
+            raise IndexError(f"transition index {i} out of range")
+        chunk = self.chunks[i // self.chunk_size]
+        j = i % self.chunk_size
+        return {field: array[j] for field, array in chunk.items()}
+
+    # 返回[start, stop)范围内的转移；跨块时需要拼接（会复制）
+    def transitions(self, start, stop):
+        parts = []
+        while start < stop:
+            index, j = divmod(start, self.chunk_size)
+            end = min(stop - start, self.chunk_size - j) + j
+            parts.append(
+                {field: array[j:end] for field, array in self.chunks[index].items()}
+            )
+            start += end - j
+        if len(parts) == 1:
+            return parts[0]
+        return {
+            field: np.concatenate([part[field] for part in parts])
+            for field in self.layouts
+        }
+
+    def episode(self, k):
+        start, length = self.episodes[k]
+        return self.transitions(int(start), int(start + length))
+
+    # 随机采样一批转移（会复制）
+    def sample(self, batch_size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        idx = rng.integers(0, self.num_transitions, size=batch_size)
+        chunk_idx, offsets = np.divmod(idx, self.chunk_size)
+        batch = {
+            field: np.empty(
+                (batch_size,) + tuple(layout["shape"]), dtype=layout["dtype"]
+            )
+            for field, layout in self.layouts.items()
+        }
+        for index in np.unique(chunk_idx):
+            mask = chunk_idx == index
+            for field, array in self.chunks[index].items():
+                batch[field][mask] = array[offsets[mask]]
+        return batch
@@ -0,0 +1,16 @@
+import numpy as np
+
+from gym_examples.wrappers.vector_wrapper import VectorWrapper
+
+
+# ClipReward的批量版本：原地裁剪整个奖励数组
+class VectorClipReward(VectorWrapper):
+    def __init__(self, env, min_reward, max_reward):
+        super().__init__(env)
+        self.min_reward = min_reward
+        self.max_reward = max_reward
+        self.reward_range = (min_reward, max_reward)
+
+    def rewards(self, rewards):
+        rewards = np.asarray(rewards, dtype=np.float64)
+        return np.clip(rewards, self.min_reward, self.max_reward, out=rewards)
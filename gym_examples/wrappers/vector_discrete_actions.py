@@ -0,0 +1,19 @@
+from gym.spaces import Discrete
+import numpy as np
+
+from gym_examples.wrappers.vector_wrapper import VectorWrapper
+
+
+# DiscreteActions的批量版本：用NumPy查找表一次把所有离散动作映射为连续动作
+class VectorDiscreteActions(VectorWrapper):
+    def __init__(self, env, disc_to_cont):
+        super().__init__(env)
+        self.disc_to_cont = np.asarray(disc_to_cont)
+        self.set_single_action_space(Discrete(len(disc_to_cont)))
+        self._actions = np.empty(
+            (self.num_envs,) + self.disc_to_cont.shape[1:],
+            dtype=self.disc_to_cont.dtype,
+        )
+
+    def actions(self, act):
+        return np.take(self.disc_to_cont, act, axis=0, out=self._actions)
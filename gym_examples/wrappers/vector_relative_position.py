@@ -0,0 +1,15 @@
+from gym.spaces import Box
+import numpy as np
+
+from gym_examples.wrappers.vector_wrapper import VectorWrapper
+
+
+# RelativePosition的批量版本：相对位置写入复用的(N, 2)缓冲区，下一步会被覆盖
+class VectorRelativePosition(VectorWrapper):
+    def __init__(self, env):
+        super().__init__(env)
+        self.set_single_observation_space(Box(shape=(2,), low=-np.inf, high=np.inf))
+        self._relative = np.empty((self.num_envs, 2), dtype=np.float32)
+
+    def observations(self, obs):
+        return np.subtract(obs["target"], obs["agent"], out=self._relative)
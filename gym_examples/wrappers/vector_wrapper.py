@@ -0,0 +1,59 @@
+from gym.vector.utils import batch_space
+
+
+# 批量环境的包装器基类，可用于任何提供num_envs、step和reset的批量环境
+# （VectorGridWorldEnv、VectorTetrisEnv、SharedMemoryVectorEnv等）。
+# 子类像gym的ActionWrapper/RewardWrapper/ObservationWrapper一样，
+# 重写actions、rewards或observations，一次处理整个批次。
+class VectorWrapper:
+    def __init__(self, env):
+        self.env = env
+        self.num_envs = env.num_envs
+        self.single_observation_space = env.single_observation_space
+        self.single_action_space = env.single_action_space
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+
+    def set_single_observation_space(self, space):
+        self.single_observation_space = space
+        self.observation_space = batch_space(space, n=self.num_envs)
+
+    def set_single_action_space(self, space):
+        self.single_action_space = space
+        self.action_space = batch_space(space, n=self.num_envs)
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        return self.observations(obs), info
+
+    def step(self, actions):
+        obs, rewards, terminated, truncated, info = self.env.step(self.actions(actions))
+        return (
+            self.observations(obs),
+            self.rewards(rewards),
+            terminated,
+            truncated,
+            info,
+        )
+
+    def actions(self, actions):
+        return actions
+
+    def rewards(self, rewards):
+        return rewards
+
+    def observations(self, obs):
+        return obs
+
+    def close(self, **kwargs):
+        return self.env.close(**kwargs)
+
+    # 其他属性转发给被包装的环境
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(f"attempted to get missing private attribute '{name}'")
+        return getattr(self.env, name)
+
+    @property
+    def unwrapped(self):
+        return getattr(self.env, "unwrapped", self.env)
@@ -0,0 +1,198 @@
+import io
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import time
+import zipfile
+import zlib
+
+import gym
+import numpy as np
+
+
+# 不依赖第三方库的PNG编码：8位RGB，每行前加一个0（不使用行过滤）后整体用zlib压缩
+def encode_png(frame, compression=6):
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    height, width = frame.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = frame.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), compression))
+        + chunk(b"IEND", b"")
+    )
+
+
+# 把一个帧写成.npy格式的字节
+def _npy_bytes(frame):
+    header = {"descr": frame.dtype.str, "fortran_order": False, "shape": frame.shape}
+    out = io.BytesIO()
+    np.lib.format.write_array_header_1_0(out, header)
+    out.write(np.ascontiguousarray(frame).tobytes())
+    return out.getvalue()
+
+
+# 后台写入循环。消息为("frame", episode, index, frame)、("end", episode)，None表示结束。
+# "png"格式每个episode一个目录，每帧一个PNG文件；"npz"格式每个episode一个压缩的.npz，
+# 帧按到达顺序逐个写入，可以用np.load读取（键为frame_000000等）
+def _writer(frames, directory, format, compression):
+    archives = {}
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            if item[0] == "end":
+                archive = archives.pop(item[1], None)
+                if archive is not None:
+                    archive.close()
+                continue
+            _, episode, index, frame = item
+            if format == "png":
+                episode_dir = os.path.join(directory, f"episode_{episode:05d}")
+                os.makedirs(episode_dir, exist_ok=True)
+                with open(
+                    os.path.join(episode_dir, f"frame_{index:06d}.png"), "wb"
+                ) as f:
+                    f.write(encode_png(frame, compression))
+            else:
+                archive = archives.get(episode)
+                if archive is None:
+                    archive = zipfile.ZipFile(
+                        os.path.join(directory, f"episode_{episode:05d}.npz"),
+                        "w",
+                        compression=zipfile.ZIP_DEFLATED,
+                        compresslevel=compression,
+                    )
+                    archives[episode] = archive
+                archive.writestr(f"frame_{index:06d}.npy", _npy_bytes(frame))
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+
+# 录制rgb_array帧的包装器：在step循环中只调用render并把帧放入有界队列，
+# PNG编码或压缩由后台线程（backend="thread"）或进程（backend="process"）完成。
+# 队列满时step会阻塞等待写入（背压），内存占用不超过queue_size帧；阻塞的总时间记在blocked_time中。
+# frame_skip=k时每k帧录制一帧；episodes可以是None（全部）、episode编号的集合或接收编号的函数
+class VideoRecorder(gym.Wrapper):
+    formats = ("png", "npz")
+    backends = ("thread", "process")
+
+    def __init__(
+        self,
+        env,
+        directory,
+        format="png",
+        backend="thread",
+        frame_skip=1,
+        episodes=None,
+        queue_size=32,
+        compression=6,
+    ):
+        super().__init__(env)
+        assert format in self.formats
+        assert backend in self.backends
+        assert frame_skip >= 1
+        assert (
+            env.render_mode == "rgb_array"
+        ), "VideoRecorder needs render_mode='rgb_array'"
+        self.directory = directory
+        self.format = format
+        self.backend = backend
+        self.frame_skip = frame_skip
+        if episodes is None:
+            self.episode_trigger = lambda episode: True
+        elif callable(episodes):
+            self.episode_trigger = episodes
+        else:
+            selected = set(episodes)
+            self.episode_trigger = selected.__contains__
+        os.makedirs(directory, exist_ok=True)
+
+        args = (directory, format, compression)
+        if backend == "thread":
+            self._frames = queue.Queue(queue_size)
+            self._worker = threading.Thread(
+                target=_writer, args=(self._frames,) + args, daemon=True
+            )
+        else:
+            self._frames = multiprocessing.Queue(queue_size)
+            self._worker = multiprocessing.Process(
+                target=_writer, args=(self._frames,) + args, daemon=True
+            )
+        self._worker.start()
+
+        self.episode = -1
+        self.recording = False
+        self.frames_recorded = 0
+        self.blocked_time = 0.0
+        self._frame_index = 0  # 当前episode中已经渲染的帧数（包括跳过的）
+        self._written = 0  # 当前episode中已经录制的帧数
+
+    # 放入队列；队列满时阻塞，同时检查后台写入是否已经异常退出
+    def _put(self, item):
+        start = time.perf_counter()
+        while True:
+            try:
+                self._frames.put(item, timeout=1.0)
+                break
+            except queue.Full:
+                if not self._worker.is_alive():
+                    raise RuntimeError("VideoRecorder writer exited unexpectedly")
+        self.blocked_time += time.perf_counter() - start
+
+    def _capture(self):
+        if self.recording and self._frame_index % self.frame_skip == 0:
+            frame = self.env.render()
+            # 线程后台与环境共享内存，需要复制；进程后台在放入队列时序列化
+            if self.backend == "thread":
+                frame = np.array(frame)
+            self._put(("frame", self.episode, self._written, frame))
+            self._written += 1
+            self.frames_recorded += 1
+        self._frame_index += 1
+
+    def _end_episode(self):
+        if self.recording:
+            self._put(("end", self.episode))
+        self.recording = False
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._end_episode()
+        self.episode += 1
+        self.recording = bool(self.episode_trigger(self.episode))
+        self._frame_index = 0
+        self._written = 0
+        self._capture()
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._capture()
+        if terminated or truncated:
+            self._end_episode()
+        return obs, reward, terminated, truncated, info
+
+    # 等待所有帧写完并结束后台线程或进程
+    def close(self):
+        if self._worker is not None:
+            self._end_episode()
+            self._put(None)
+            self._worker.join()
+            self._worker = None
+        return self.env.close()